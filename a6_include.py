@@ -78,6 +78,25 @@ class DynamicArray:
         return len(self._data)
 
 
+class CompactDynamicArray:
+    """
+    DynamicArray using __slots__ instead of a per-instance __dict__
+    """
+    __slots__ = ('_data',)
+
+    __init__ = DynamicArray.__init__
+    __iter__ = DynamicArray.__iter__
+    __str__ = DynamicArray.__str__
+    append = DynamicArray.append
+    pop = DynamicArray.pop
+    swap = DynamicArray.swap
+    get_at_index = DynamicArray.get_at_index
+    __getitem__ = DynamicArray.__getitem__
+    set_at_index = DynamicArray.set_at_index
+    __setitem__ = DynamicArray.__setitem__
+    length = DynamicArray.length
+
+
 def hash_function_1(key: str) -> int:
     """Sample Hash function #1 to be used with HashMap implementation"""
     hash = 0
@@ -103,17 +122,31 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    def __init__(self, key: str, value: object, next: "SLNode" = None, hash: int = None) -> None:
+        """Initialize node given a key, value and (optionally) the hash of the key."""
         self.key = key
         self.value = value
         self.next = next
+        self.hash = hash
+
+        # Position of the node in the insertion order of the hash map
+        self.order = None
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
         return '(' + str(self.key) + ': ' + str(self.value) + ')'
 
 
+class CompactSLNode:
+    """
+    SLNode using __slots__ instead of a per-instance __dict__
+    """
+    __slots__ = ('key', 'value', 'next', 'hash', 'order')
+
+    __init__ = SLNode.__init__
+    __str__ = SLNode.__str__
+
+
 class LinkedListIterator:
     """
     Separate iterator class for LinkedList
@@ -141,9 +174,13 @@ class LinkedListIterator:
 class LinkedList:
     """
     Class implementing a Singly Linked List
-    Supported methods are: insert, remove, contains, length, iterator
+    Supported methods are: insert, insert_node, pop_node, remove, contains,
+    length, iterator
     """
 
+    # Class of the nodes created by insert.
+    _node_class = SLNode
+
     def __init__(self) -> None:
         """
         Initialize new linked list;
@@ -168,35 +205,64 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
-        """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+    def insert(self, key: str, value: object, hash: int = None) -> SLNode:
+        """Insert new node at front of the list and return it."""
+        self._head = self._node_class(key, value, self._head, hash)
+        self._size += 1
+        return self._head
+
+    def insert_node(self, node: SLNode) -> None:
+        """Link an existing node at front of the list."""
+        node.next = self._head
+        self._head = node
         self._size += 1
 
-    def remove(self, key: str) -> bool:
+    def pop_node(self) -> SLNode:
+        """Unlink the node at front of the list and return it, or None if empty."""
+        node = self._head
+        if node:
+            self._head = node.next
+            node.next = None
+            self._size -= 1
+        return node
+
+    def remove(self, key: str, hash: int = None) -> bool:
         """
         Remove first node with matching key.
+        If the hash of the key is given, nodes with a different cached
+        hash are skipped without comparing keys.
         Return True if removal was successful, False otherwise.
         """
+        return self.remove_node(key, hash) is not None
+
+    def remove_node(self, key: str, hash: int = None) -> SLNode:
+        """
+        Remove first node with matching key, as remove() does.
+        Return the removed node, or None if the key was not found.
+        """
         previous, node = None, self._head
         while node:
 
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
                     self._head = node.next
                 self._size -= 1
-                return True
+                return node
 
             previous, node = node, node.next
-        return False
+        return None
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def contains(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        If the hash of the key is given, nodes with a different cached
+        hash are skipped without comparing keys.
+        """
         node = self._head
         while node:
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 return node
             node = node.next
         return node
@@ -206,18 +272,53 @@ class LinkedList:
         return self._size
 
 
+class CompactLinkedList:
+    """
+    LinkedList of CompactSLNode using __slots__ instead of a
+    per-instance __dict__
+    """
+    __slots__ = ('_head', '_size')
+
+    _node_class = CompactSLNode
+
+    __init__ = LinkedList.__init__
+    __str__ = LinkedList.__str__
+    __iter__ = LinkedList.__iter__
+    insert = LinkedList.insert
+    insert_node = LinkedList.insert_node
+    pop_node = LinkedList.pop_node
+    remove = LinkedList.remove
+    remove_node = LinkedList.remove_node
+    contains = LinkedList.contains
+    length = LinkedList.length
+
+
 # ---------- For use in Open Addressing (OA) HashMap  ---------- #
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
         """Initialize an entry for use in a hash map."""
         self.key = key
         self.value = value
+        self.hash = hash
 
         # Set this value to True when you "delete" a HashEntry
         self.is_tombstone = False
 
+        # Position of the entry in the insertion order of the hash map
+        self.order = None
+
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
         return f"K: {self.key} V: {self.value} TS: {self.is_tombstone}"
+
+
+class CompactHashEntry:
+    """
+    HashEntry using __slots__ instead of a per-instance __dict__
+    """
+    __slots__ = ('key', 'value', 'hash', 'is_tombstone', 'order')
+
+    __init__ = HashEntry.__init__
+    __str__ = HashEntry.__str__
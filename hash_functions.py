@@ -0,0 +1,151 @@
+# Course: CS261 - Data Structures
+# Description: Hash functions for the HashMap implementations. Each one
+# takes a string key and returns a non-negative integer, so it can be
+# passed as the function parameter of any HashMap constructor in place
+# of hash_function_1 or hash_function_2.
+
+import struct
+
+from a6_include import hash_function_1, hash_function_2
+
+
+HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+# 64-bit FNV-1a parameters.
+FNV_OFFSET_BASIS = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+
+# 64-bit xxHash primes.
+XX_PRIME_1 = 0x9E3779B185EBCA87
+XX_PRIME_2 = 0xC2B2AE3D27D4EB4F
+XX_PRIME_3 = 0x165667B19E3779F9
+XX_PRIME_4 = 0x85EBCA77C2B2AE63
+XX_PRIME_5 = 0x27D4EB2F165667C5
+
+
+def _rotate_left(value: int, bits: int) -> int:
+    '''
+    Returns the 64-bit value rotated left by the given bits.
+    '''
+    return ((value << bits) | (value >> (64 - bits))) & HASH_MASK
+
+
+def mix64(hash: int) -> int:
+    '''
+    Returns the hash with its bits spread over all 64 bits, so keys
+    whose hashes differ in a few low bits land in unrelated buckets.
+    Uses the finalizer of xxHash64.
+
+    :param hash:    integer to mix.
+
+    :return:    an integer between 0 and 2 ** 64 - 1.
+    '''
+    hash &= HASH_MASK
+    hash = ((hash ^ (hash >> 33)) * XX_PRIME_2) & HASH_MASK
+    hash = ((hash ^ (hash >> 29)) * XX_PRIME_3) & HASH_MASK
+    return hash ^ (hash >> 32)
+
+
+def hash_function_fnv1a(key: str) -> int:
+    '''
+    64-bit FNV-1a hash of the UTF-8 bytes of the key: each byte is
+    XORed into the hash, which is then multiplied by the FNV prime.
+
+    :param key: key to hash.
+
+    :return:    an integer between 0 and 2 ** 64 - 1.
+    '''
+    hash = FNV_OFFSET_BASIS
+    for byte in key.encode():
+        hash = ((hash ^ byte) * FNV_PRIME) & HASH_MASK
+    return hash
+
+
+def hash_function_xx(key: str, seed: int = 0) -> int:
+    '''
+    xxHash64 style hash of the UTF-8 bytes of the key. Reads the key
+    8 bytes at a time, mixing each word into the accumulator with a
+    multiply and rotate round, and finishes with mix64.
+
+    :param key:     key to hash.
+    :param seed:    seed of the accumulator, a different seed gives an
+                    unrelated hash function.
+
+    :return:    an integer between 0 and 2 ** 64 - 1.
+    '''
+    data = key.encode()
+    length = len(data)
+    hash = (seed + XX_PRIME_5 + length) & HASH_MASK
+
+    whole = length - length % 8
+    for word, in struct.iter_unpack('<Q', data[:whole]):
+        word = (_rotate_left((word * XX_PRIME_2) & HASH_MASK, 31) * XX_PRIME_1) & HASH_MASK
+        hash = (_rotate_left(hash ^ word, 27) * XX_PRIME_1 + XX_PRIME_4) & HASH_MASK
+
+    for byte in data[whole:]:
+        hash = (_rotate_left(hash ^ (byte * XX_PRIME_5), 11) * XX_PRIME_1) & HASH_MASK
+
+    return mix64(hash)
+
+
+def hash_function_builtin(key: str) -> int:
+    '''
+    Python's built-in hash of the key (SipHash for strings, computed in
+    C and cached on the string object), as a non-negative integer.
+    String hashes are randomized per process unless PYTHONHASHSEED is
+    set, so bucket positions change between runs.
+
+    :param key: key to hash.
+
+    :return:    an integer between 0 and 2 ** 64 - 1.
+    '''
+    return hash(key) & HASH_MASK
+
+
+def mixed(function: callable) -> callable:
+    '''
+    Returns a hash function that applies mix64 to the result of the
+    given one. Spreads the hashes of a function that has few
+    collisions but clusters its results, like hash_function_2. It does
+    not remove collisions, keys with equal hashes stay equal.
+
+    :param function:    hash function to wrap.
+
+    :return:    the wrapped hash function.
+    '''
+    def hash_function(key: str) -> int:
+        return mix64(function(key))
+
+    hash_function.__name__ = 'mixed_' + function.__name__
+    return hash_function
+
+
+HASH_FUNCTIONS = {
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    'mixed_2': mixed(hash_function_2),
+    'fnv1a': hash_function_fnv1a,
+    'xx': hash_function_xx,
+    'builtin': hash_function_builtin,
+}
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nanagram example 1")
+    print("-----------------")
+    for name, function in HASH_FUNCTIONS.items():
+        print(name, function('str12') == function('str21'))
+
+    print("\nbucket example 1")
+    print("----------------")
+    capacity = 11
+    for name in ('hash_function_1', 'fnv1a', 'xx'):
+        function = HASH_FUNCTIONS[name]
+        print(name, [function('str' + str(i)) % capacity for i in range(10, 20)])
+
+    print("\nfnv1a example 1")
+    print("---------------")
+    print(hex(hash_function_fnv1a('')), hex(hash_function_fnv1a('a')))
@@ -0,0 +1,595 @@
+# Course: CS261 - Data Structures
+# Description: Benchmarks for the HashMap implementations.
+#              Run every benchmark with `python hash_map_bench.py`, or a
+#              single one with `python hash_map_bench.py <name> [size]`.
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import hash_map_concurrent
+import hash_map_flat
+import hash_map_oa
+import hash_map_rh
+import hash_map_sc
+import hash_map_sharded
+import primes
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+from hash_functions import HASH_FUNCTIONS
+
+
+def _measure(setup: callable, action: callable) -> tuple:
+    '''
+    Runs the action on a fresh object from setup twice, once to time
+    it and once under tracemalloc to get its peak memory.
+
+    :param setup:   callable returning the object to run the action on.
+    :param action:  callable taking the object from setup.
+
+    :return:    a tuple (seconds, peak bytes).
+    '''
+    target = setup()
+    start = time.perf_counter()
+    action(target)
+    seconds = time.perf_counter() - start
+
+    target = setup()
+    tracemalloc.start()
+    action(target)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return seconds, peak
+
+
+def _retained(build: callable) -> tuple:
+    '''
+    Calls build under tracemalloc and measures the memory still held
+    by its result.
+
+    :param build:   callable returning the object to measure.
+
+    :return:    a tuple (object, bytes).
+    '''
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    target = build()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return target, retained
+
+
+def _lookup_time(m: object, keys: list) -> float:
+    '''
+    Returns the mean time of m.get over the keys, in microseconds.
+    '''
+    get = m.get
+    start = time.perf_counter()
+    for key in keys:
+        get(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def _sc_map(size: int) -> hash_map_sc.HashMap:
+    '''
+    Returns a separate chaining hash map filled with size keys.
+    '''
+    m = hash_map_sc.HashMap(size, hash_function_2)
+    for i in range(size):
+        m.put('key' + str(i), i)
+    return m
+
+
+def _legacy_sc_resize(m: hash_map_sc.HashMap, new_capacity: int) -> None:
+    '''
+    Resizes the separate chaining hash map by putting every key/value
+    pair again, the way resize_table used to work.
+    '''
+    temp_buckets = m._buckets
+    m._capacity = m._next_prime(new_capacity)
+    m.clear()
+    for number in range(temp_buckets.length()):
+        for node in temp_buckets.get_at_index(number):
+            m.put(node.key, node.value)
+
+
+def _legacy_next_prime(capacity: int) -> int:
+    '''
+    Returns the closest prime number from the given number using trial
+    division, the way _next_prime used to work.
+    '''
+    if capacity % 2 == 0:
+        capacity += 1
+
+    while True:
+        factor = 3
+        while factor ** 2 <= capacity and capacity % factor:
+            factor += 2
+        if factor ** 2 > capacity:
+            return capacity
+        capacity += 2
+
+
+def _legacy_find_mode(da: DynamicArray) -> tuple:
+    '''
+    Finds the mode with contains_key, get and put for every value and
+    a scan of get_keys_and_values, the way find_mode used to work.
+    '''
+    m = hash_map_sc.HashMap()
+    for number in range(da.length()):
+        key = da.get_at_index(number)
+        if m.contains_key(key):
+            m.put(key, m.get(key) + 1)
+        else:
+            m.put(key, 1)
+
+    pairs = m.get_keys_and_values()
+    frequency = 0
+    modes = DynamicArray()
+    for number in range(pairs.length()):
+        if pairs.get_at_index(number)[1] > frequency:
+            frequency = pairs.get_at_index(number)[1]
+            modes = DynamicArray()
+            modes.append(pairs.get_at_index(number)[0])
+        elif pairs.get_at_index(number)[1] == frequency:
+            modes.append(pairs.get_at_index(number)[0])
+    return modes, frequency
+
+
+# ------------------- BENCHMARKS ------------------------------------------- #
+
+def bench_sc_resize(size: int = 200000) -> None:
+    '''
+    Compares resizing a separate chaining hash map by relinking its
+    nodes against putting every key/value pair again.
+    '''
+    print(f"\nsc resize ({size} keys)")
+    print("------------------------")
+    for name, resize in (("re-put", _legacy_sc_resize),
+                         ("relink", hash_map_sc.HashMap.resize_table)):
+        seconds, peak = _measure(lambda: _sc_map(size),
+                                 lambda m: resize(m, m.get_capacity() * 2))
+        print(f"{name:8} {seconds:8.3f} s {peak / 2**20:10.2f} MiB peak")
+
+
+def bench_bulk(size: int = 1000000) -> None:
+    '''
+    Compares put_many and get_many against calling put and get for
+    every key, starting from the default capacity. Uses the built-in
+    hash so probe lengths do not hide the per-call costs.
+    '''
+    print(f"\nbulk operations ({size} keys)")
+    print("----------------------------")
+    pairs = DynamicArray([('key' + str(i), i) for i in range(size)])
+    keys = DynamicArray(['key' + str(i) for i in range(size)])
+
+    for name, module in (("oa", hash_map_oa), ("sc", hash_map_sc)):
+        m = module.HashMap(11, hash)
+        start = time.perf_counter()
+        for number in range(pairs.length()):
+            m.put(*pairs.get_at_index(number))
+        put_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for number in range(keys.length()):
+            m.get(keys.get_at_index(number))
+        get_seconds = time.perf_counter() - start
+
+        m = module.HashMap(11, hash)
+        start = time.perf_counter()
+        m.put_many(pairs)
+        put_many_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        m.get_many(keys)
+        get_many_seconds = time.perf_counter() - start
+
+        print(f"{name} put {put_seconds:8.3f} s  put_many {put_many_seconds:8.3f} s"
+              f"  ({put_seconds / put_many_seconds:.1f}x)")
+        print(f"{name} get {get_seconds:8.3f} s  get_many {get_many_seconds:8.3f} s"
+              f"  ({get_seconds / get_many_seconds:.1f}x)")
+
+
+def bench_flat(size: int = 1000000) -> None:
+    '''
+    Compares the memory per entry and the get latency of the flat
+    array storage against one HashEntry per bucket.
+    '''
+    print(f"\nflat storage ({size} keys)")
+    print("-------------------------")
+    keys = ['key' + str(i) for i in range(size)]
+    misses = ['miss' + str(i) for i in range(size)]
+
+    for name, module in (("oa", hash_map_oa), ("flat", hash_map_flat)):
+        def build():
+            m = module.HashMap(2 * size, hash)
+            for i, key in enumerate(keys):
+                m.put(key, i)
+            return m
+
+        m, retained = _retained(build)
+        print(f"{name:5} {retained / size:7.1f} bytes/entry"
+              f"  hit {_lookup_time(m, keys):6.3f} us  miss {_lookup_time(m, misses):6.3f} us")
+
+
+def bench_slots(size: int = None) -> None:
+    '''
+    Compares the memory per entry of both hash maps with the default
+    classes and with the __slots__ based ones (compact=True), at 100k,
+    1M and 10M entries or at the given size.
+    '''
+    sizes = (size,) if size else (100000, 1000000, 10000000)
+
+    for size in sizes:
+        print(f"\n__slots__ memory ({size} keys)")
+        print("-----------------------------")
+        keys = ['key' + str(i) for i in range(size)]
+
+        for name, module in (("oa", hash_map_oa), ("sc", hash_map_sc)):
+            for compact in (False, True):
+                def build():
+                    m = module.HashMap(11, hash, compact=compact)
+                    m.put_many(DynamicArray([(key, None) for key in keys]))
+                    return m
+
+                m, retained = _retained(build)
+                label = "compact" if compact else "default"
+                print(f"{name} {label:8} {retained / size:7.1f} bytes/entry")
+                del m
+
+
+def bench_robin_hood(size: int = 200000) -> None:
+    '''
+    Compares the get latency for hits and misses of Robin Hood probing
+    at several loads against quadratic probing at its highest load.
+    Uses the built-in hash: linear probing needs a well distributed
+    hash, with hash_function_2 both schemes are dominated by clusters.
+    '''
+    print(f"\nrobin hood probing ({size} keys)")
+    print("--------------------------------")
+    keys = ['key' + str(i) for i in range(size)]
+    misses = ['miss' + str(i) for i in range(size)]
+
+    runs = [("quadratic", 0.45, lambda capacity: hash_map_oa.HashMap(capacity, hash))]
+    for load in (0.45, 0.7, 0.85, 0.95):
+        runs.append(("robin hood", load,
+                     lambda capacity: hash_map_rh.HashMap(capacity, hash, max_load=0.99)))
+
+    for name, load, build in runs:
+        m = build(int(size / load))
+        for i, key in enumerate(keys):
+            m.put(key, i)
+        print(f"{name:10} load {m.table_load():4.2f}"
+              f"  hit {_lookup_time(m, keys):7.3f} us  miss {_lookup_time(m, misses):7.3f} us")
+
+
+def bench_hashes(size: int = 100000) -> None:
+    '''
+    Compares the hash functions by throughput, by how evenly they fill
+    the buckets of a separate chaining hash map (chi-squared divided by
+    its expected value, so 1.0 is uniform, and the longest chain) and
+    by the resulting get latency.
+    '''
+    print(f"\nhash functions ({size} keys)")
+    print("----------------------------")
+    keys = ['str' + str(i) for i in range(size)]
+
+    for name, function in HASH_FUNCTIONS.items():
+        start = time.perf_counter()
+        for key in keys:
+            function(key)
+        rate = size / (time.perf_counter() - start) / 1e6
+
+        m = hash_map_sc.HashMap(size, function)
+        m.put_many(DynamicArray([(key, None) for key in keys]))
+
+        capacity = m.get_capacity()
+        expected = size / capacity
+        chi_squared = 0
+        longest = 0
+        for number in range(capacity):
+            bucket = m._buckets.get_at_index(number)
+            length = bucket.length() if bucket else 0
+            chi_squared += (length - expected) ** 2 / expected
+            longest = max(longest, length)
+
+        print(f"{name:16} {rate:6.2f} Mkeys/s  chi2 {chi_squared / (capacity - 1):8.2f}"
+              f"  max chain {longest:5}  get {_lookup_time(m, keys):8.3f} us")
+
+
+def bench_power_of_two(size: int = 200000) -> None:
+    '''
+    Compares prime capacities against power of two capacities, for
+    puts from the default capacity (including every resize) and gets.
+    Uses the built-in hash, masking keeps only its low bits.
+    '''
+    print(f"\npower of two capacities ({size} keys)")
+    print("-------------------------------------")
+    keys = ['key' + str(i) for i in range(size)]
+
+    for name, module in (("oa", hash_map_oa), ("sc", hash_map_sc)):
+        for power_of_two in (False, True):
+            m = module.HashMap(11, hash, power_of_two=power_of_two)
+            start = time.perf_counter()
+            for i, key in enumerate(keys):
+                m.put(key, i)
+            put_seconds = time.perf_counter() - start
+
+            label = "power of 2" if power_of_two else "prime"
+            print(f"{name} {label:10} put {put_seconds:7.3f} s"
+                  f"  get {_lookup_time(m, keys):6.3f} us  capacity {m.get_capacity()}")
+
+
+def bench_primes(size: int = 2 ** 40) -> None:
+    '''
+    Times the capacities of a table doubling from 11 up to size, with
+    trial division and with the shared prime table.
+    '''
+    print(f"\nprime capacities (up to {size})")
+    print("--------------------------------")
+    for name, function in (("trial", _legacy_next_prime), ("table", primes.next_prime)):
+        primes._LADDER.clear()
+        start = time.perf_counter()
+        capacity = 11
+        while capacity < size:
+            capacity = function(capacity * 2)
+        seconds = time.perf_counter() - start
+        print(f"{name:6} {seconds * 1e3:10.3f} ms  last capacity {capacity}")
+
+
+def bench_load_sweep(size: int = 100000) -> None:
+    '''
+    Sweeps the maximum load and growth factor of both hash maps and
+    prints the memory per entry against the get latency of each
+    setting, with a bar for the latency.
+    '''
+    print(f"\nload factor sweep ({size} keys)")
+    print("-------------------------------")
+    keys = ['key' + str(i) for i in range(size)]
+    settings = {
+        "oa": ((0.4, 4), (0.5, 2), (0.65, 1.5), (0.8, 1.5)),
+        "sc": ((0.5, 4), (1.0, 2), (2.0, 1.5), (4.0, 1.5)),
+    }
+
+    for name, module in (("oa", hash_map_oa), ("sc", hash_map_sc)):
+        for max_load, growth_factor in settings[name]:
+            def build():
+                m = module.HashMap(11, hash, max_load=max_load, growth_factor=growth_factor)
+                for i, key in enumerate(keys):
+                    m.put(key, i)
+                return m
+
+            m, retained = _retained(build)
+            latency = _lookup_time(m, keys)
+            print(f"{name} max load {max_load:4} growth {growth_factor:3}x"
+                  f"  load {m.table_load():4.2f} {retained / size:7.1f} bytes/entry"
+                  f"  get {latency:6.3f} us  " + "#" * round(latency * 20))
+            del m
+
+
+def bench_iteration(size: int = 1000000) -> None:
+    '''
+    Compares exporting every key/value pair with get_keys_and_values
+    against walking the items() generator, by time and peak memory.
+    '''
+    print(f"\niteration ({size} keys)")
+    print("----------------------")
+    pairs = DynamicArray([('key' + str(i), i) for i in range(size)])
+
+    for name, module in (("oa", hash_map_oa), ("sc", hash_map_sc)):
+        def setup():
+            m = module.HashMap(11, hash)
+            m.put_many(pairs)
+            return m
+
+        def export(m):
+            total = 0
+            kv = m.get_keys_and_values()
+            for number in range(kv.length()):
+                total += kv.get_at_index(number)[1]
+
+        def walk(m):
+            total = 0
+            for key, value in m.items():
+                total += value
+
+        for label, action in (("get_keys_and_values", export), ("items", walk)):
+            seconds, peak = _measure(setup, action)
+            print(f"{name} {label:19} {seconds:8.3f} s {peak / 2**20:10.2f} MiB peak")
+
+
+def bench_upsert(size: int = 1000000) -> None:
+    '''
+    Compares counting words with contains_key, get and put against a
+    single increment per word.
+    '''
+    print(f"\nupsert ({size} words)")
+    print("---------------------")
+    words = ['word' + str(i % (size // 10 + 1)) for i in range(size)]
+
+    for name, module in (("oa", hash_map_oa), ("sc", hash_map_sc)):
+        m = module.HashMap(11, hash)
+        start = time.perf_counter()
+        for word in words:
+            if m.contains_key(word):
+                m.put(word, m.get(word) + 1)
+            else:
+                m.put(word, 1)
+        lookup_seconds = time.perf_counter() - start
+
+        m = module.HashMap(11, hash)
+        start = time.perf_counter()
+        for word in words:
+            m.increment(word)
+        increment_seconds = time.perf_counter() - start
+
+        print(f"{name} contains/get/put {lookup_seconds:8.3f} s  increment {increment_seconds:8.3f} s"
+              f"  ({lookup_seconds / increment_seconds:.1f}x)")
+
+
+def bench_find_mode(size: int = 200000) -> None:
+    '''
+    Compares the old find_mode against the counting engine, with
+    hash_function_1 (the old default) and with the built-in hash, and
+    times top_k over a generator of the same words.
+    '''
+    print(f"\nfind_mode ({size} words, {size // 40} distinct)")
+    print("-----------------------------------------")
+    words = ['word' + str(i * 7919 % (size // 40)) for i in range(size)]
+    da = DynamicArray(words)
+
+    runs = (("legacy", _legacy_find_mode),
+            ("engine hash_1", lambda da: hash_map_sc.find_mode(da, hash_function_1)),
+            ("engine builtin", hash_map_sc.find_mode))
+    for name, function in runs:
+        start = time.perf_counter()
+        modes, frequency = function(da)
+        seconds = time.perf_counter() - start
+        print(f"{name:14} {seconds:8.3f} s  {modes.length()} modes, frequency {frequency}")
+
+    start = time.perf_counter()
+    hash_map_sc.top_k((word for word in words), 10)
+    print(f"{'top_k stream':14} {time.perf_counter() - start:8.3f} s")
+
+
+def bench_parallel(size: int = 4000000) -> None:
+    '''
+    Times find_mode_parallel with 1 to 16 processes on a dynamic array
+    and on a generator, against the number of CPUs of the machine.
+    '''
+    print(f"\nparallel find_mode ({size} words, {os.cpu_count()} CPUs)")
+    print("-------------------------------------------------")
+    da = DynamicArray(['word' + str(i * 7919 % (size // 100)) for i in range(size)])
+
+    base = None
+    for processes in (1, 2, 4, 8, 16):
+        start = time.perf_counter()
+        hash_map_sc.find_mode_parallel(da, processes)
+        seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hash_map_sc.find_mode_parallel((da.get_at_index(i) for i in range(size)), processes)
+        stream_seconds = time.perf_counter() - start
+
+        base = base or seconds
+        print(f"{processes:2} processes  array {seconds:8.3f} s ({base / seconds:4.1f}x)"
+              f"  stream {stream_seconds:8.3f} s")
+
+
+def bench_sharded(size: int = 1000000) -> None:
+    '''
+    Compares a single hash map against sharded ones by total put time
+    and by the longest put, which is the one doing the largest resize.
+    Uses the built-in hash so the shards get even shares of the keys.
+    '''
+    print(f"\nsharded hash map ({size} keys)")
+    print("------------------------------")
+    keys = ['key' + str(i) for i in range(size)]
+
+    runs = [("single", 1, lambda: hash_map_sc.HashMap(11, hash))]
+    for shards in (4, 16):
+        runs.append((f"{shards} shards", shards,
+                     lambda shards=shards: hash_map_sharded.ShardedHashMap(11, hash, shards)))
+
+    for name, shards, build in runs:
+        m = build()
+        put = m.put
+        longest = 0
+        start = time.perf_counter()
+        for i, key in enumerate(keys):
+            before = time.perf_counter()
+            put(key, i)
+            longest = max(longest, time.perf_counter() - before)
+        seconds = time.perf_counter() - start
+        print(f"{name:9} put {seconds:7.3f} s  longest put {longest * 1e3:8.2f} ms"
+              f"  get {_lookup_time(m, keys):6.3f} us")
+
+
+class _LockedMap:
+    '''
+    Separate chaining hash map behind a single lock, the baseline of
+    the thread benchmark.
+    '''
+    def __init__(self, capacity: int, function: callable) -> None:
+        self._map = hash_map_sc.HashMap(capacity, function)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> object:
+        with self._lock:
+            return self._map.get(key)
+
+    def increment(self, key: str) -> int:
+        with self._lock:
+            return self._map.increment(key)
+
+
+def bench_threads(size: int = 400000) -> None:
+    '''
+    Runs size operations (90% get, 10% increment over 10k keys) split
+    between 1, 4 and 16 threads on thread-safe hash maps, and checks
+    that no increment was lost. Without free-threaded Python the
+    threads share one interpreter lock, so this measures the locking
+    overhead and contention rather than parallel speedup.
+    '''
+    print(f"\nthreads ({size} operations)")
+    print("--------------------------")
+    keys = ['key' + str(i) for i in range(10000)]
+    runs = (("global lock", lambda: _LockedMap(11, hash)),
+            ("sharded", lambda: hash_map_sharded.ShardedHashMap(11, hash, 16)),
+            ("concurrent", lambda: hash_map_concurrent.ConcurrentHashMap(11, hash)))
+
+    for name, build in runs:
+        for threads in (1, 4, 16):
+            m = build()
+            operations = size // threads
+
+            def work(seed: int) -> None:
+                for i in range(operations):
+                    key = keys[(i * 7919 + seed) % len(keys)]
+                    if i % 10 == 0:
+                        m.increment(key)
+                    else:
+                        m.get(key)
+
+            workers = [threading.Thread(target=work, args=(seed,)) for seed in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            seconds = time.perf_counter() - start
+
+            increments = sum(m.get(key) or 0 for key in keys)
+            expected = threads * len(range(0, operations, 10))
+            print(f"{name:11} {threads:2} threads {operations * threads / seconds / 1e3:8.1f} kops/s"
+                  f"  increments {'ok' if increments == expected else 'LOST'}")
+
+
+BENCHMARKS = {
+    'sc_resize': bench_sc_resize,
+    'bulk': bench_bulk,
+    'flat': bench_flat,
+    'slots': bench_slots,
+    'robin_hood': bench_robin_hood,
+    'hashes': bench_hashes,
+    'power_of_two': bench_power_of_two,
+    'primes': bench_primes,
+    'load_sweep': bench_load_sweep,
+    'iteration': bench_iteration,
+    'upsert': bench_upsert,
+    'find_mode': bench_find_mode,
+    'parallel': bench_parallel,
+    'sharded': bench_sharded,
+    'threads': bench_threads,
+}
+
+
+if __name__ == "__main__":
+
+    names = sys.argv[1:2] or list(BENCHMARKS)
+    sizes = [int(arg) for arg in sys.argv[2:3]]
+    for name in names:
+        BENCHMARKS[name](*sizes)
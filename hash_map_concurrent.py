@@ -0,0 +1,437 @@
+# Course: CS261 - Data Structures
+# Description: Hash Map using separate chaining that can be shared
+# between threads. Writers lock the stripe of buckets their key falls
+# in, so writers on different stripes do not wait for each other.
+# Readers take no lock: a new node is complete before it is linked at
+# the head of its chain, a removed node keeps its link to the rest of
+# the chain, and a resize copies every node into a new table that is
+# published in one assignment, so a reader always walks a valid chain
+# of the table it started with.
+
+import threading
+
+from a6_include import DynamicArray, LinkedList, SLNode, hash_function_1, hash_function_2
+from primes import next_prime
+
+
+class ConcurrentHashMap:
+    def __init__(self, capacity: int = 11, function: callable = hash_function_1,
+                 stripes: int = 16, max_load: float = 1.0) -> None:
+        """
+        Initialize new ConcurrentHashMap that uses
+        separate chaining for collision resolution
+        The buckets are split in stripes ranges, each guarded by its
+        own lock, and the table grows to twice its capacity when the
+        table load reaches max_load
+        """
+        self._hash_function = function
+        self._max_load = max_load
+
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+        # Key/value pairs and buckets with a non-empty chain of each
+        # stripe, only changed while holding the lock of the stripe.
+        self._sizes = [0] * stripes
+        self._occupied = [0] * stripes
+
+        self._table = self._new_table(next_prime(capacity))
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        table = self._table
+        out = ''
+        for i in range(table.length()):
+            out += str(i) + ': ' + str(table.get_at_index(i)) + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map, exact when no writer is running
+        """
+        return sum(self._sizes)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._table.length()
+
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _new_table(capacity: int) -> DynamicArray:
+        '''
+        Returns a table of empty linked lists.
+        '''
+        return DynamicArray([LinkedList() for _ in range(capacity)])
+
+    def _stripe(self, index: int, capacity: int) -> int:
+        '''
+        Returns the stripe of the bucket, the stripes being ranges of
+        consecutive buckets.
+        '''
+        return index * len(self._locks) // capacity
+
+    def _write(self, key: str, action: callable) -> object:
+        '''
+        Calls the action on the chain of the key while holding the lock
+        of its stripe, then grows the table if the table load reached
+        the maximum load.
+
+        :param key:     key to write.
+        :param action:  callable taking the chain, the hash of the key
+                        and the stripe.
+
+        :return:    the result of the action.
+        '''
+        hash = self._hash_function(key)
+
+        while True:
+            table = self._table
+            capacity = table.length()
+            index = hash % capacity
+            stripe = self._stripe(index, capacity)
+
+            with self._locks[stripe]:
+                # A resize published a new table while this thread
+                # waited for the lock, the key is looked for again in
+                # the new one.
+                if table is not self._table:
+                    continue
+                result = action(table.get_at_index(index), hash, stripe)
+            break
+
+        if self.get_size() >= self._max_load * capacity:
+            self._grow(capacity)
+
+        return result
+
+    def _insert(self, chain: LinkedList, key: str, value: object, hash: int, stripe: int) -> SLNode:
+        '''
+        Links a new node at the head of the chain and updates the
+        counters of the stripe. The lock of the stripe must be held.
+        '''
+        if chain.length() == 0:
+            self._occupied[stripe] += 1
+        self._sizes[stripe] += 1
+        return chain.insert(key, value, hash)
+
+    def put(self, key: str, value: object) -> None:
+        '''
+        Updates the key/value pair in the hash map. If the key is
+        already in the hash map, updates its value. If not, it adds
+        a new key/value pair.
+
+        :param key:     key to be inserted or updated.
+        :param value:   value to be associated with the key.
+        '''
+        def action(chain, hash, stripe):
+            node = chain.contains(key, hash)
+            if node:
+                node.value = value
+            else:
+                self._insert(chain, key, value, hash, stripe)
+
+        self._write(key, action)
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        '''
+        Returns the value associated with the key, adding the key with
+        the default value first if it is not in the hash map.
+
+        :return:    the value associated with the key.
+        '''
+        def action(chain, hash, stripe):
+            node = chain.contains(key, hash)
+            if node is None:
+                node = self._insert(chain, key, default, hash, stripe)
+            return node.value
+
+        return self._write(key, action)
+
+    def update(self, key: str, function: callable, default: object = None) -> object:
+        '''
+        Replaces the value associated with the key by the result of
+        calling the function on it, atomically with respect to other
+        writers. A key that is not in the hash map is added with the
+        function called on the default value.
+
+        :return:    the new value associated with the key.
+        '''
+        def action(chain, hash, stripe):
+            node = chain.contains(key, hash)
+            if node:
+                node.value = function(node.value)
+            else:
+                node = self._insert(chain, key, function(default), hash, stripe)
+            return node.value
+
+        return self._write(key, action)
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        '''
+        Adds delta to the value associated with the key, atomically
+        with respect to other writers. A key that is not in the hash
+        map is added with the value delta.
+
+        :return:    the new value associated with the key.
+        '''
+        def action(chain, hash, stripe):
+            node = chain.contains(key, hash)
+            if node:
+                node.value += delta
+            else:
+                node = self._insert(chain, key, delta, hash, stripe)
+            return node.value
+
+        return self._write(key, action)
+
+    def remove(self, key: str) -> None:
+        '''
+        Removes the given key and its value from the hash map.
+
+        :param key: key to remove from the hash map.
+        '''
+        def action(chain, hash, stripe):
+            if chain.remove_node(key, hash):
+                self._sizes[stripe] -= 1
+                if chain.length() == 0:
+                    self._occupied[stripe] -= 1
+
+        self._write(key, action)
+
+    def get(self, key: str, default: object = None) -> object:
+        '''
+        Returns the value associated with the key if it exists
+        on the hash map. Takes no lock.
+
+        :param key:     key for the value we are searching for.
+        :param default: value returned if the key is not found.
+        '''
+        hash = self._hash_function(key)
+        table = self._table
+        node = table.get_at_index(hash % table.length()).contains(key, hash)
+        if node:
+            return node.value
+        return default
+
+    def contains_key(self, key: str) -> bool:
+        '''
+        Looks for the presence of the key in the hash map. Takes no
+        lock.
+
+        :param key: key to look for in the hash map.
+
+        :return:    True if the key is found
+                    False otherwise.
+        '''
+        hash = self._hash_function(key)
+        table = self._table
+        return table.get_at_index(hash % table.length()).contains(key, hash) is not None
+
+    def table_load(self) -> float:
+        '''
+        Returns the load factor of the hash map.
+
+        :return:    a float representing the load factor.
+        '''
+        return float(self.get_size() / self.get_capacity())
+
+    def empty_buckets(self) -> int:
+        '''
+        Returns the number of empty buckets in the hash table.
+
+        :return:    an integer representing number of empty buckets.
+        '''
+        return self.get_capacity() - sum(self._occupied)
+
+    def _lock_all(self) -> None:
+        '''
+        Acquires the lock of every stripe, always in the same order so
+        two threads locking every stripe cannot deadlock.
+        '''
+        for lock in self._locks:
+            lock.acquire()
+
+    def _unlock_all(self) -> None:
+        '''
+        Releases the lock of every stripe.
+        '''
+        for lock in self._locks:
+            lock.release()
+
+    def _grow(self, capacity: int) -> None:
+        '''
+        Doubles the capacity of the table, unless another thread
+        already resized it since its capacity was read.
+
+        :param capacity:    capacity the writer saw.
+        '''
+        self._lock_all()
+        try:
+            if self._table.length() == capacity:
+                self._rehash(next_prime(capacity * 2))
+        finally:
+            self._unlock_all()
+
+    def _rehash(self, new_capacity: int) -> None:
+        '''
+        Copies every key/value pair into a new table and publishes it.
+        The nodes of the old table are left untouched for the readers
+        still walking it. The lock of every stripe must be held.
+
+        :param new_capacity:    capacity of the new table.
+        '''
+        old_table = self._table
+        table = self._new_table(new_capacity)
+        sizes = [0] * len(self._locks)
+        occupied = [0] * len(self._locks)
+
+        for number in range(old_table.length()):
+            for node in old_table.get_at_index(number):
+                index = node.hash % new_capacity
+                chain = table.get_at_index(index)
+                stripe = self._stripe(index, new_capacity)
+                if chain.length() == 0:
+                    occupied[stripe] += 1
+                sizes[stripe] += 1
+                chain.insert(node.key, node.value, node.hash)
+
+        self._sizes = sizes
+        self._occupied = occupied
+        self._table = table
+
+    def resize_table(self, new_capacity: int) -> None:
+        '''
+        Changes the capacity of the internal hash table. Key/value
+        pairs are copied to the new table.
+
+        :param new_capacity:    new capacity for the hash map.
+        '''
+        if new_capacity < 1:
+            return
+
+        self._lock_all()
+        try:
+            # Keeps growing the capacity while the table load would be
+            # above the maximum load.
+            new_capacity = next_prime(new_capacity)
+            while self.get_size() > self._max_load * new_capacity:
+                new_capacity = next_prime(new_capacity * 2)
+            self._rehash(new_capacity)
+        finally:
+            self._unlock_all()
+
+    def clear(self) -> None:
+        '''
+        Clears the contents of the hash map while maintaining
+        the current capacity.
+        '''
+        self._lock_all()
+        try:
+            self._sizes = [0] * len(self._locks)
+            self._occupied = [0] * len(self._locks)
+            self._table = self._new_table(self._table.length())
+        finally:
+            self._unlock_all()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        '''
+        Returns an array containing tuples of all key/value pairs
+        stored in the hash map.
+
+        :return:    a dynamic array with tuples of key/value pairs.
+        '''
+        return DynamicArray(list(self.items()))
+
+    def __iter__(self):
+        '''
+        Returns a generator of the nodes of the hash map. Every call
+        returns an independent generator. It walks the table as it was
+        when iteration started, never raises because of other threads
+        and may or may not see changes made while it runs.
+        '''
+        table = self._table
+        for number in range(table.length()):
+            yield from table.get_at_index(number)
+
+    def keys(self):
+        '''
+        Returns a weakly consistent generator of the keys.
+        '''
+        for node in self:
+            yield node.key
+
+    def values(self):
+        '''
+        Returns a weakly consistent generator of the values.
+        '''
+        for node in self:
+            yield node.value
+
+    def items(self):
+        '''
+        Returns a weakly consistent generator of the key/value pairs.
+        '''
+        for node in self:
+            yield node.key, node.value
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput example 1")
+    print("-------------")
+    m = ConcurrentHashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nget example 1")
+    print("-------------")
+    m = ConcurrentHashMap(31, hash_function_2)
+    for i in range(200, 300, 7):
+        m.put(str(i), i * 10)
+    print(m.get_size(), m.get_capacity())
+    for i in range(200, 300, 21):
+        print(i, m.get(str(i)), m.get(str(i)) == i * 10)
+        print(i + 1, m.get(str(i + 1)), m.get(str(i + 1)) == (i + 1) * 10)
+
+    print("\nremove example 1")
+    print("----------------")
+    m = ConcurrentHashMap(11, hash_function_2, stripes=4)
+    for i in range(6):
+        m.put('key' + str(i), i)
+    m.remove('key3')
+    m.remove('key9')
+    print(m.get_size(), m.get('key3'), m.get('key4'), m.contains_key('key5'))
+
+    print("\nthreads example 1")
+    print("-----------------")
+    m = ConcurrentHashMap(11, hash_function_2, stripes=4)
+
+    def count(offset: int) -> None:
+        for i in range(3000):
+            m.increment('key' + str((i + offset) % 500))
+
+    threads = [threading.Thread(target=count, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(m.get_size(), sum(m.values()), m.get_capacity())
+
+    print("\niterators example 1")
+    print("-------------------")
+    m = ConcurrentHashMap(11, hash_function_2)
+    for i in range(5):
+        m.put('str' + str(i), i)
+    first, second = iter(m), iter(m)
+    print(next(first).key, next(first).key, next(second).key)
+    for key in m.keys():
+        m.remove(key)
+    print(m.get_size(), list(m.items()))
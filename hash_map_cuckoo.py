@@ -0,0 +1,403 @@
+# Course: CS261 - Data Structures
+# Description: Hash Map using cuckoo hashing for collision resolution.
+# Every key has one bucket in each of two tables, given by two hash
+# functions, and lives in one of them (or in a small stash), so a
+# lookup checks at most two buckets. Inserting into a full bucket
+# evicts its entry to the other table, up to MAX_KICKS times, before
+# the entry goes to the stash or the tables are rehashed.
+
+from array import array
+
+from a6_include import (DynamicArray, HashEntry,
+                        hash_function_1, hash_function_2)
+from hash_functions import hash_function_fnv1a, hash_function_xx
+from primes import is_prime, next_prime
+
+
+HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+# Odd 64-bit constant used to mix the hashes with the table seeds.
+MIX_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+def _mix(hash: int, seed: int) -> int:
+    '''
+    Returns the hash combined with the seed and spread over 64 bits.
+    '''
+    hash = ((hash ^ seed) * MIX_MULTIPLIER) & HASH_MASK
+    return hash ^ (hash >> 29)
+
+
+class HashMap:
+    # Evictions tried by an insert before using the stash.
+    MAX_KICKS = 32
+
+    # Entries that can wait in the stash before the tables are rehashed.
+    STASH_SIZE = 4
+
+    # Rehash attempts with new seeds before entries are allowed to
+    # overflow the stash.
+    MAX_REHASHES = 4
+
+    def __init__(self, capacity: int, function=hash_function_fnv1a,
+                 function_2=hash_function_xx, max_load: float = 0.45) -> None:
+        """
+        Initialize new HashMap that uses
+        cuckoo hashing for collision resolution
+        capacity is the number of buckets of both tables together and
+        the tables grow when the table load would pass max_load
+        """
+        self._hash_function = function
+        self._hash_function_2 = function_2
+        self._max_load = max_load
+        self._seeds = (0, MIX_MULTIPLIER)
+
+        self._allocate(self._next_prime((capacity + 1) // 2))
+        self._stash = []
+        self._stash_size = self.STASH_SIZE
+        self._size = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(2 * self._table_capacity):
+            entry = None
+            if self._used[i]:
+                entry = HashEntry(self._keys[i], self._values[i], self._hashes[i])
+            out += str(i) + ': ' + str(entry) + '\n'
+        for key, value, hash, hash_2 in self._stash:
+            out += 'stash: ' + str(HashEntry(key, value, hash)) + '\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Find the closest prime number from the given number using
+        the shared prime table
+        """
+        return next_prime(capacity)
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        return is_prime(capacity)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map (buckets of both tables)
+        """
+        return 2 * self._table_capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, table_capacity: int) -> None:
+        '''
+        Creates two empty tables with the given number of buckets each,
+        stored one after the other in the same arrays.
+
+        :param table_capacity:  number of buckets of each table.
+        '''
+        self._table_capacity = table_capacity
+        self._keys = [None] * (2 * table_capacity)
+        self._values = [None] * (2 * table_capacity)
+        self._hashes = array('Q', bytes(16 * table_capacity))
+        self._hashes_2 = array('Q', bytes(16 * table_capacity))
+        self._used = bytearray(2 * table_capacity)
+
+    def _bucket(self, table: int, hash: int, hash_2: int) -> int:
+        '''
+        Returns the bucket of a key in the given table (0 or 1). The
+        first table uses both hashes, as keys sharing hash_function_1
+        (anagrams, for instance) would otherwise all evict each other
+        from the same bucket.
+        '''
+        if table == 0:
+            return _mix(hash * MIX_MULTIPLIER + hash_2, self._seeds[0]) % self._table_capacity
+        return self._table_capacity + _mix(hash_2, self._seeds[1]) % self._table_capacity
+
+    def _hashes_of(self, key: str) -> tuple:
+        '''
+        Returns the two hashes of the key.
+        '''
+        return self._hash_function(key) & HASH_MASK, self._hash_function_2(key) & HASH_MASK
+
+    def _find(self, key: str, hash: int, hash_2: int) -> int:
+        '''
+        Looks for the key in its two buckets and in the stash.
+
+        :return:    the bucket of the key, -2 - position if it is in
+                    the stash, or -1 if it is not found.
+        '''
+        for table in (0, 1):
+            index = self._bucket(table, hash, hash_2)
+            if self._used[index] and self._hashes[index] == hash and self._keys[index] == key:
+                return index
+
+        for position in range(len(self._stash)):
+            if self._stash[position][0] == key:
+                return -2 - position
+
+        return -1
+
+    def _place(self, key: str, value: object, hash: int, hash_2: int, overflow: bool = False) -> bool:
+        '''
+        Inserts a key that is not in the hash map, evicting entries to
+        their other table up to MAX_KICKS times.
+
+        :param overflow:    if True the stash can grow past its limit.
+
+        :return:    True if the pair was placed
+                    False if the pair left without a bucket did not fit
+                    in the stash. The pair is stored in _homeless.
+        '''
+        used = self._used
+        keys = self._keys
+        values = self._values
+        hashes = self._hashes
+        hashes_2 = self._hashes_2
+
+        # Uses a free bucket of either table if there is one.
+        for table in (0, 1):
+            index = self._bucket(table, hash, hash_2)
+            if not used[index]:
+                used[index] = 1
+                keys[index], values[index], hashes[index], hashes_2[index] = key, value, hash, hash_2
+                return True
+
+        table = 0
+        for _ in range(self.MAX_KICKS):
+            index = self._bucket(table, hash, hash_2)
+            if not used[index]:
+                used[index] = 1
+                keys[index], values[index], hashes[index], hashes_2[index] = key, value, hash, hash_2
+                return True
+
+            # Swaps with the entry in the bucket, which moves on to its
+            # bucket in the other table.
+            keys[index], key = key, keys[index]
+            values[index], value = value, values[index]
+            hashes[index], hash = hash, hashes[index]
+            hashes_2[index], hash_2 = hash_2, hashes_2[index]
+            table = 1 - table
+
+        if overflow or len(self._stash) < self._stash_size:
+            self._stash.append((key, value, hash, hash_2))
+            return True
+
+        self._homeless = (key, value, hash, hash_2)
+        return False
+
+    def put(self, key: str, value: object) -> None:
+        '''
+        Updates the key/value pair in the hash map. If the key is
+        already in the hash map, updates its value. If not, it adds
+        a new key/value pair.
+
+        :param key:     key to be inserted or updated.
+        :param value:   value to be associated with the key.
+        '''
+        hash, hash_2 = self._hashes_of(key)
+
+        index = self._find(key, hash, hash_2)
+        if index >= 0:
+            self._values[index] = value
+            return
+        if index < -1:
+            position = -2 - index
+            self._stash[position] = (key, value, hash, hash_2)
+            return
+
+        # Grows the tables if the new pair would pass the maximum load.
+        if self._size + 1 > self._max_load * self.get_capacity():
+            self._rehash(self._next_prime(self._table_capacity * 2))
+
+        if not self._place(key, value, hash, hash_2):
+            self._rehash(self._table_capacity, self._homeless)
+        self._size += 1
+
+    def _rehash(self, table_capacity: int, extra: tuple = None) -> None:
+        '''
+        Places every pair again in new tables, trying new seeds when a
+        pair is left without a bucket. After MAX_REHASHES attempts the
+        stash is allowed to keep every pair left out, which only happens
+        for keys whose two hashes are equal and that no seed or capacity
+        can separate.
+
+        :param table_capacity:  number of buckets of each new table.
+        :param extra:           pair waiting to be placed, if any.
+        '''
+        entries = [(self._keys[number], self._values[number], self._hashes[number], self._hashes_2[number])
+                   for number in range(2 * self._table_capacity) if self._used[number]]
+        entries.extend(self._stash)
+        if extra is not None:
+            entries.append(extra)
+
+        attempt = 0
+        while True:
+            self._allocate(table_capacity)
+            self._stash = []
+            overflow = attempt == self.MAX_REHASHES
+
+            if all(self._place(*entry, overflow=overflow) for entry in entries):
+                break
+
+            attempt += 1
+            self._seeds = (_mix(self._seeds[0], attempt), _mix(self._seeds[1], attempt))
+
+        self._stash_size = max(self.STASH_SIZE, len(self._stash))
+
+    def table_load(self) -> float:
+        '''
+        Returns the load factor of the hash map.
+
+        :return:    a float representing the load factor.
+        '''
+        return float(self._size / self.get_capacity())
+
+    def empty_buckets(self) -> int:
+        '''
+        Returns the number of empty buckets in the hash table.
+
+        :return:    an integer representing number of empty buckets.
+        '''
+        return self.get_capacity() - self._size + len(self._stash)
+
+    def resize_table(self, new_capacity: int) -> None:
+        '''
+        Changes the capacity of the internal hash tables. Key/value
+        pairs are maintained and placed with their stored hashes.
+
+        :param new_capacity:    new capacity for the hash map (buckets
+                                of both tables).
+        '''
+        if new_capacity < self._size:
+            return
+
+        table_capacity = self._next_prime((new_capacity + 1) // 2)
+        while self._size > self._max_load * 2 * table_capacity:
+            table_capacity = self._next_prime(table_capacity * 2)
+
+        self._rehash(table_capacity)
+
+    def get(self, key: str) -> object:
+        '''
+        Returns the value associated with the key if it exists
+        on the hash map.
+
+        :param key: key for the value we are searching for.
+        '''
+        index = self._find(key, *self._hashes_of(key))
+        if index >= 0:
+            return self._values[index]
+        if index < -1:
+            return self._stash[-2 - index][1]
+        return None
+
+    def contains_key(self, key: str) -> bool:
+        '''
+        Looks for the presence of the key in the hash map.
+
+        :param key: key to look for in the hash map.
+
+        :return:    True if the key is found
+                    False otherwise.
+        '''
+        if self._size == 0:
+            return False
+        return self._find(key, *self._hashes_of(key)) != -1
+
+    def remove(self, key: str) -> None:
+        '''
+        Removes the given key and its value from the hash map.
+
+        :param key: key to remove from the hash map.
+        '''
+        index = self._find(key, *self._hashes_of(key))
+        if index == -1:
+            return
+
+        if index >= 0:
+            self._used[index] = 0
+            self._keys[index] = None
+            self._values[index] = None
+        else:
+            self._stash.pop(-2 - index)
+        self._size -= 1
+
+    def clear(self) -> None:
+        '''
+        Clears the contents of the hash map while maintaining
+        the current capacity.
+        '''
+        self._allocate(self._table_capacity)
+        self._stash = []
+        self._stash_size = self.STASH_SIZE
+        self._size = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        '''
+        Returns an array containing tuples of all key/value pairs
+        stored in the hash map.
+
+        :return:    a dynamic array with tuples of key/value pairs.
+        '''
+        return DynamicArray([(entry.key, entry.value) for entry in self])
+
+    def __iter__(self):
+        '''
+        Returns a generator of hash entries built from the arrays.
+        '''
+        used = self._used
+        for number in range(len(used)):
+            if used[number]:
+                yield HashEntry(self._keys[number], self._values[number], self._hashes[number])
+        for key, value, hash, hash_2 in self._stash:
+            yield HashEntry(key, value, hash)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput example 1")
+    print("-------------")
+    m = HashMap(53)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nget example 1")
+    print("-------------")
+    m = HashMap(151)
+    for i in range(200, 300, 7):
+        m.put(str(i), i * 10)
+    print(m.get_size(), m.get_capacity())
+    for i in range(200, 300, 21):
+        print(i, m.get(str(i)), m.get(str(i)) == i * 10)
+        print(i + 1, m.get(str(i + 1)), m.get(str(i + 1)) == (i + 1) * 10)
+
+    print("\nsample hash functions example 1")
+    print("-------------------------------")
+    m = HashMap(11, hash_function_1, hash_function_2)
+    for i in range(400):
+        m.put('k' + str(i), i)
+    print(m.get_size(), m.get('k123'), m.get_capacity())
+
+    print("\nremove example 1")
+    print("----------------")
+    m = HashMap(11)
+    for i in range(4):
+        m.put('key' + str(i), i)
+    m.remove('key3')
+    print(m)
+    print(m.get_size(), m.get('key3'), m.get('key2'))
@@ -0,0 +1,594 @@
+# Course: CS261 - Data Structures
+# Description: Hash Map using open addressing with quadratic probing,
+# like hash_map_oa, but storing keys, values, hashes and slot states in
+# parallel flat arrays instead of one HashEntry object per bucket. The
+# insertion order is an array of slot numbers.
+
+from array import array
+
+from a6_include import (CompactDynamicArray, DynamicArray, HashEntry,
+                        hash_function_1, hash_function_2)
+from primes import is_prime, next_prime
+
+
+# Slot states.
+EMPTY = 0
+FULL = 1
+DELETED = 2
+
+# Hashes are stored as unsigned 64-bit integers.
+HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+class HashMap:
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new HashMap that uses
+        quadratic probing for collision resolution
+        """
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+
+        # Changes on every added or removed key/value pair and every
+        # resize, so iterators can detect them.
+        self._version = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            entry = None
+            if self._states[i] != EMPTY:
+                entry = HashEntry(self._keys[i], self._values[i], self._hashes[i])
+                entry.is_tombstone = self._states[i] == DELETED
+            out += str(i) + ': ' + str(entry) + '\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Find the closest prime number from the given number using
+        the shared prime table
+        """
+        return next_prime(capacity)
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        return is_prime(capacity)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, capacity: int) -> None:
+        '''
+        Creates empty storage arrays with the given number of slots.
+
+        :param capacity:    number of slots.
+        '''
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._states = bytearray(capacity)
+        self._deleted = 0
+
+        # Slots in insertion order (-1 for removed pairs) and the
+        # position of each slot in that order.
+        self._order = array('q')
+        self._positions = array('q', bytes(8 * capacity))
+        self._holes = 0
+
+    def _probe(self, key: str, hash: int) -> int:
+        '''
+        Looks for the key using quadratic probing.
+
+        :param key:     key to look for.
+        :param hash:    hash of the key.
+
+        :return:    the slot of the key, or -1 - slot, where slot is
+                    the first empty or deleted slot of the probe
+                    sequence, if the key is not in the hash map.
+        '''
+        states = self._states
+        hashes = self._hashes
+        keys = self._keys
+        capacity = self._capacity
+
+        index = hash % capacity
+        new_index = index
+        quadratic_factor = 1
+        free = -1
+
+        # Deleted slots keep the probe sequence going. Keys are only
+        # compared when the stored hashes match.
+        state = states[index]
+        while state != EMPTY:
+            if state == FULL:
+                if hashes[new_index] == hash and keys[new_index] == key:
+                    return new_index
+            elif free < 0:
+                free = new_index
+            new_index = (index + quadratic_factor**2) % capacity
+            quadratic_factor += 1
+            state = states[new_index]
+
+        if free < 0:
+            free = new_index
+        return -1 - free
+
+    def put(self, key: str, value: object) -> None:
+        '''
+        Updates the key/value pair in the hash map. If the key is
+        already in the hash map, updates its value. If not, it adds
+        a new key/value pair.
+
+        :param key:     key to be inserted or updated.
+        :param value:   value to be associated with the key.
+        '''
+        self._make_room()
+        if self._place(key, self._hash_function(key) & HASH_MASK, value):
+            self._size += 1
+
+    def _make_room(self) -> None:
+        '''
+        Resizes the hash map if the used slots (including deleted ones)
+        would reach half of the capacity with one more key, which is as
+        far as quadratic probing is guaranteed to find an empty slot.
+        Mostly deleted tables are rehashed at the same capacity.
+        '''
+        if 2 * (self._size + self._deleted + 1) >= self._capacity:
+            if 4 * (self._size + 1) >= self._capacity:
+                self.resize_table(self._next_prime(self._capacity * 2))
+            else:
+                self.resize_table(self._capacity)
+
+    def _place(self, key: str, hash: int, value: object) -> bool:
+        '''
+        Inserts or updates the key/value pair without checking the
+        table load or updating the size.
+
+        :param key:     key to be inserted or updated.
+        :param hash:    hash of the key, masked to 64 bits.
+        :param value:   value to be associated with the key.
+
+        :return:    True if a new key/value pair was added
+                    False if an existing one was updated.
+        '''
+        index = self._probe(key, hash)
+
+        if index >= 0:
+            self._values[index] = value
+            return False
+
+        self._fill(-1 - index, key, hash, value)
+        return True
+
+    def _fill(self, index: int, key: str, hash: int, value: object) -> None:
+        '''
+        Stores a new key/value pair in an empty or deleted slot and adds
+        it at the end of the insertion order. Does not update the size.
+
+        :param index:   slot of the new pair.
+        :param key:     key of the new pair.
+        :param hash:    hash of the key, masked to 64 bits.
+        :param value:   value of the new pair.
+        '''
+        if self._states[index] == DELETED:
+            self._deleted -= 1
+        self._keys[index] = key
+        self._values[index] = value
+        self._hashes[index] = hash
+        self._states[index] = FULL
+        self._positions[index] = len(self._order)
+        self._order.append(index)
+        self._version += 1
+
+    def table_load(self) -> float:
+        '''
+        Returns the load factor of the hash map.
+
+        :return:    a float representing the load factor.
+        '''
+        return float(self._size / self._capacity)
+
+    def empty_buckets(self) -> int:
+        '''
+        Returns the number of empty buckets in the hash table.
+
+        :return:    an integer representing number of empty buckets.
+        '''
+        return self._capacity - self._size
+
+    def resize_table(self, new_capacity: int) -> None:
+        '''
+        Changes the capacity of the internal hash table. Key/value
+        pairs are maintained and placed with their stored hashes.
+
+        :param new_capacity:    new capacity for the hash map.
+        '''
+        if new_capacity < self._size:
+            return
+
+        if not self._is_prime(new_capacity):
+            new_capacity = self._next_prime(new_capacity)
+
+        # Keeps growing the capacity while the table load would not
+        # stay below 0.5.
+        while 2 * self._size >= new_capacity:
+            new_capacity = self._next_prime(new_capacity * 2)
+
+        keys, values, hashes, order = self._keys, self._values, self._hashes, self._order
+        self._capacity = new_capacity
+        self._allocate(new_capacity)
+
+        # Keys are unique, so each one goes to the first empty slot of
+        # its probe sequence. Following the insertion order keeps it
+        # and drops its holes.
+        for number in order:
+            if number >= 0:
+                index = -1 - self._probe(None, hashes[number])
+                self._fill(index, keys[number], hashes[number], values[number])
+
+    def get(self, key: str, default: object = None) -> object:
+        '''
+        Returns the value associated with the key if it exists
+        on the hash map.
+
+        :param key:     key for the value we are searching for.
+        :param default: value returned if the key is not found.
+        '''
+        index = self._probe(key, self._hash_function(key) & HASH_MASK)
+        if index >= 0:
+            return self._values[index]
+        return default
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        '''
+        Returns the value associated with the key, adding the key with
+        the default value first if it is not in the hash map.
+
+        :param key:     key for the value we are searching for.
+        :param default: value of the key if it is added.
+
+        :return:    the value associated with the key.
+        '''
+        self._make_room()
+        hash = self._hash_function(key) & HASH_MASK
+        index = self._probe(key, hash)
+        if index >= 0:
+            return self._values[index]
+
+        self._fill(-1 - index, key, hash, default)
+        self._size += 1
+        return default
+
+    def update(self, key: str, function: callable, default: object = None) -> object:
+        '''
+        Replaces the value associated with the key by the result of
+        calling the function on it, with a single lookup. A key that is
+        not in the hash map is added with the function called on the
+        default value.
+
+        :param key:         key of the value to update.
+        :param function:    callable taking the current value and
+                            returning the new one.
+        :param default:     current value of a key that is not found.
+
+        :return:    the new value associated with the key.
+        '''
+        self._make_room()
+        hash = self._hash_function(key) & HASH_MASK
+        index = self._probe(key, hash)
+        if index >= 0:
+            self._values[index] = function(self._values[index])
+            return self._values[index]
+
+        # The value of a new key is computed before the key is added,
+        # so a function that raises leaves the hash map unchanged.
+        value = function(default)
+        self._fill(-1 - index, key, hash, value)
+        self._size += 1
+        return value
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        '''
+        Adds delta to the value associated with the key, with a single
+        lookup. A key that is not in the hash map is added with the
+        value delta.
+
+        :param key:     key of the counter.
+        :param delta:   amount to add.
+
+        :return:    the new value associated with the key.
+        '''
+        self._make_room()
+        hash = self._hash_function(key) & HASH_MASK
+        index = self._probe(key, hash)
+        if index >= 0:
+            self._values[index] += delta
+            return self._values[index]
+
+        # A new counter starts from 0 like the others, so a delta that
+        # cannot be added to it raises before the key is added.
+        value = 0 + delta
+        self._fill(-1 - index, key, hash, value)
+        self._size += 1
+        return value
+
+    def contains_key(self, key: str) -> bool:
+        '''
+        Looks for the presence of the key in the hash map.
+
+        :param key: key to look for in the hash map.
+
+        :return:    True if the key is found
+                    False otherwise.
+        '''
+        if self._size == 0:
+            return False
+        return self._probe(key, self._hash_function(key) & HASH_MASK) >= 0
+
+    def remove(self, key: str) -> None:
+        '''
+        Removes the given key and its value from the hash map.
+
+        :param key: key to remove from the hash map.
+        '''
+        index = self._probe(key, self._hash_function(key) & HASH_MASK)
+
+        # Marks the slot as deleted and drops the references to the
+        # key and value.
+        if index >= 0:
+            self._keys[index] = None
+            self._values[index] = None
+            self._states[index] = DELETED
+            self._deleted += 1
+            self._size -= 1
+            self._drop_order(index)
+
+    def _drop_order(self, index: int) -> None:
+        '''
+        Leaves a hole at the position of the removed slot in the
+        insertion order. The holes are dropped once they outnumber the
+        key/value pairs, so iterating stays O(size).
+
+        :param index:   slot of the removed pair.
+        '''
+        self._order[self._positions[index]] = -1
+        self._holes += 1
+        self._version += 1
+
+        if self._holes > self._size:
+            self._order = array('q', [number for number in self._order if number >= 0])
+            for position in range(len(self._order)):
+                self._positions[self._order[position]] = position
+            self._holes = 0
+
+    def clear(self) -> None:
+        '''
+        Clears the contents of the hash map while maintaining
+        the current capacity.
+        '''
+        self._allocate(self._capacity)
+        self._size = 0
+        self._version += 1
+
+    def get_keys_and_values(self) -> DynamicArray:
+        '''
+        Returns an array containing tuples of all key/value pairs
+        stored in the hash map.
+
+        :return:    a dynamic array with tuples of key/value pairs, in
+                    insertion order.
+        '''
+        keys, values = self._keys, self._values
+        return DynamicArray([(keys[number], values[number]) for number in self._order if number >= 0])
+
+    @classmethod
+    def from_pairs(cls, pairs, function) -> "HashMap":
+        '''
+        Builds a hash map from key/value pairs in a single pass. The
+        arrays are sized once from the number of pairs, every key is
+        hashed and then the pairs are placed.
+
+        :param pairs:       a dynamic array (or any iterable) with
+                            tuples of key/value pairs.
+        :param function:    hash function of the new hash map.
+
+        :return:    the new hash map.
+        '''
+        if isinstance(pairs, (DynamicArray, CompactDynamicArray)):
+            pairs = [pairs.get_at_index(number) for number in range(pairs.length())]
+        else:
+            pairs = list(pairs)
+
+        hashes = [function(key) & HASH_MASK for key, value in pairs]
+
+        # Twice as many slots as pairs keeps the load below 0.5.
+        hash_map = cls(2 * len(pairs) + 1, function)
+        for (key, value), hash in zip(pairs, hashes):
+            if hash_map._place(key, hash, value):
+                hash_map._size += 1
+
+        return hash_map
+
+    def put_many(self, pairs: DynamicArray) -> None:
+        '''
+        Updates the hash map with every key/value pair in the array.
+        The arrays are resized at most once, to fit every pair, before
+        the pairs are inserted.
+
+        :param pairs:   a dynamic array with tuples of key/value pairs.
+        '''
+        # Resizes once so the used slots stay below half of the
+        # capacity even if every key is new.
+        count = self._size + pairs.length()
+        if 2 * (count + self._deleted) >= self._capacity:
+            self.resize_table(2 * count + 1)
+
+        hash_function = self._hash_function
+        place = self._place
+
+        for number in range(pairs.length()):
+            key, value = pairs.get_at_index(number)
+            if place(key, hash_function(key) & HASH_MASK, value):
+                self._size += 1
+
+    def get_many(self, keys: DynamicArray) -> DynamicArray:
+        '''
+        Returns the values associated with the keys.
+
+        :param keys:    a dynamic array with the keys to look for.
+
+        :return:    a dynamic array with the value of each key (None
+                    for keys not in the hash map), in the same order.
+        '''
+        values = []
+        probe = self._probe
+        hash_function = self._hash_function
+
+        for number in range(keys.length()):
+            key = keys.get_at_index(number)
+            index = probe(key, hash_function(key) & HASH_MASK)
+            values.append(self._values[index] if index >= 0 else None)
+
+        return DynamicArray(values)
+
+    def remove_many(self, keys: DynamicArray) -> None:
+        '''
+        Removes the given keys and their values from the hash map.
+
+        :param keys:    a dynamic array with the keys to remove.
+        '''
+        remove = self.remove
+
+        for number in range(keys.length()):
+            remove(keys.get_at_index(number))
+
+    def _iterate(self):
+        '''
+        Yields the slots of the key/value pairs in insertion order,
+        skipping the holes left by removed pairs.
+
+        :raise RuntimeError:    if a key/value pair was added or
+                                removed, or the table resized, while
+                                iterating.
+        '''
+        version = self._version
+        for number in self._order:
+            if number >= 0:
+                yield number
+                if self._version != version:
+                    raise RuntimeError('HashMap changed during iteration')
+
+    def keys(self):
+        '''
+        Returns a generator of the keys of the hash map, in insertion
+        order. Unlike get_keys_and_values, no array is built.
+        '''
+        for number in self._iterate():
+            yield self._keys[number]
+
+    def values(self):
+        '''
+        Returns a generator of the values of the hash map, in insertion
+        order.
+        '''
+        for number in self._iterate():
+            yield self._values[number]
+
+    def items(self):
+        '''
+        Returns a generator of the key/value pairs of the hash map, as
+        tuples in insertion order.
+        '''
+        for number in self._iterate():
+            yield self._keys[number], self._values[number]
+
+    def __iter__(self):
+        '''
+        Returns a generator of hash entries built from the arrays, in
+        insertion order.
+        '''
+        for number in self._iterate():
+            yield HashEntry(self._keys[number], self._values[number], self._hashes[number])
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput example 1")
+    print("-------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nget example 1")
+    print("-------------")
+    m = HashMap(151, hash_function_2)
+    for i in range(200, 300, 7):
+        m.put(str(i), i * 10)
+    print(m.get_size(), m.get_capacity())
+    for i in range(200, 300, 21):
+        print(i, m.get(str(i)), m.get(str(i)) == i * 10)
+        print(i + 1, m.get(str(i + 1)), m.get(str(i + 1)) == (i + 1) * 10)
+
+    print("\nremove example 1")
+    print("----------------")
+    m = HashMap(53, hash_function_1)
+    print(m.get('key1'))
+    m.put('key1', 10)
+    print(m.get('key1'))
+    m.remove('key1')
+    print(m.get('key1'), m.contains_key('key1'))
+
+    print("\n__iter__() example 1")
+    print("--------------------")
+    m = HashMap(10, hash_function_2)
+    for i in range(5):
+        m.put(str(i), str(i * 24))
+    m.remove('0')
+    m.remove('4')
+    print(m)
+    for item in m:
+        print('K:', item.key, 'V:', item.value)
+
+    print("\nfrom_pairs(), put_many(), get_many(), remove_many() example 1")
+    print("-------------------------------------------------------------")
+    m = HashMap.from_pairs(DynamicArray([('a', 1), ('b', 2), ('a', 3)]), hash_function_1)
+    m.put_many(DynamicArray([(str(i), i) for i in range(20)]))
+    m.remove_many(DynamicArray(['b', '5', 'z']))
+    print(m.get_size(), m.get_capacity(), m.get_many(DynamicArray(['a', 'b', '7'])))
+
+    print("\nsetdefault(), update(), increment(), keys(), values(), items() example 1")
+    print("------------------------------------------------------------------------")
+    m = HashMap(11, hash_function_2)
+    for word in 'the quick brown fox jumps over the lazy dog the end'.split():
+        m.increment(word)
+    m.remove('quick')
+    m.setdefault('cat', 0)
+    m.update('fox', lambda value: value * 10)
+    print(list(m.keys()))
+    print(list(m.values()))
+    print(list(m.items())[:3], m.get('quick', 'missing'))
@@ -7,27 +7,87 @@
 # and the methods needed to work with it using open addresing
 # with quadratic probing for collision resolution.
 
-from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
-                        hash_function_1, hash_function_2)
+import math
+
+from a6_include import (CompactDynamicArray, CompactHashEntry, DynamicArray,
+                        HashEntry, hash_function_1, hash_function_2)
+from hash_functions import hash_function_fnv1a, mixed
+from primes import is_prime, next_prime
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    # Number of old buckets visited per operation during an
+    # incremental resize.
+    MIGRATE_BUCKETS = 8
+
+    def __init__(self, capacity: int, function, incremental: bool = False,
+                 compact: bool = False, tombstone_threshold: float = 0.25,
+                 power_of_two: bool = False, max_load: float = 0.5,
+                 growth_factor: float = 2.0, min_load: float = 0.0) -> None:
         """
         Initialize new HashMap that uses
         quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        If incremental is True, resizes triggered by put move the
+        entries to the new table a few buckets per operation instead
+        of all at once
+        If compact is True, buckets and entries use the __slots__
+        based classes to save memory
+        The table is compacted when tombstones reach the fraction
+        tombstone_threshold of the capacity
+        If power_of_two is True, capacities are powers of two, the
+        hash is masked instead of taking a modulo and the probing
+        uses triangular numbers, which needs a hash function that
+        mixes its low bits well
+        The table grows by growth_factor when the table load reaches
+        max_load. When removals bring it below min_load (0 never
+        shrinks) the table shrinks to a load halfway between both,
+        but never below the initial capacity. Above 0.5 quadratic probing
+        can run out of buckets and grow the table early, triangular
+        probing reaches every bucket
         """
-        self._buckets = DynamicArray()
+        # Classes used for the bucket array and the entries.
+        self._array_class = CompactDynamicArray if compact else DynamicArray
+        self._entry_class = CompactHashEntry if compact else HashEntry
+
+        self._buckets = self._array_class()
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number (or a power of two)
+        self._power_of_two = power_of_two
+        self._capacity = self._next_capacity(capacity)
         for _ in range(self._capacity):
             self._buckets.append(None)
 
         self._hash_function = function
         self._size = 0
 
+        # Load thresholds and growth factor of the resizes. Shrinking
+        # stops at the initial capacity.
+        self._max_load = max_load
+        self._growth_factor = growth_factor
+        self._min_load = min_load
+        self._min_capacity = self._capacity
+
+        # Entries in insertion order, with None where an entry was
+        # removed.
+        self._entries = []
+        self._holes = 0
+
+        # Changes on every insertion, removal or resize, so iterators
+        # can detect that the hash map changed under them.
+        self._version = 0
+
+        # Tombstones in the current table.
+        self._tombstones = 0
+        self._tombstone_threshold = tombstone_threshold
+
+        # Old table and position of an incremental resize.
+        self._incremental = incremental
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._old_size = 0
+        self._migrate_index = 0
+        self._migrate_buckets = self.MIGRATE_BUCKETS
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
@@ -40,36 +100,46 @@ class HashMap:
 
     def _next_prime(self, capacity: int) -> int:
         """
-        Increment from given number to find the closest prime number
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Find the closest prime number from the given number using
+        the shared prime table
         """
-        if capacity % 2 == 0:
-            capacity += 1
-
-        while not self._is_prime(capacity):
-            capacity += 2
-
-        return capacity
+        return next_prime(capacity)
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
         """
         Determine if given integer is a prime number and return boolean
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
-        if capacity == 2 or capacity == 3:
-            return True
+        return is_prime(capacity)
 
-        if capacity == 1 or capacity % 2 == 0:
-            return False
+    def _next_capacity(self, capacity: int) -> int:
+        '''
+        Returns the closest valid capacity from the given number: a
+        power of two or a prime number, depending on the policy.
+        '''
+        if self._power_of_two:
+            return 1 << max(capacity - 1, 0).bit_length()
+        return self._next_prime(capacity)
 
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
+    def _grown_capacity(self, capacity: int) -> int:
+        '''
+        Returns the capacity after growing the given one by the growth
+        factor (by one bucket at least), following the policy.
+        '''
+        return self._next_capacity(max(int(capacity * self._growth_factor), capacity + 1))
 
-        return True
+    def _shrink(self) -> None:
+        '''
+        Shrinks the table if the table load is below the minimum load.
+        The new load is halfway between the minimum and maximum loads,
+        so the table is not resized again until it changes by a
+        fraction of its size in either direction.
+        '''
+        if self._size < self._min_load * self._capacity and self._capacity > self._min_capacity:
+            target_load = (self._min_load + self._max_load) / 2
+            new_capacity = max(math.ceil(self._size / target_load), self._min_capacity)
+            if new_capacity < self._capacity:
+                self.resize_table(new_capacity)
 
     def get_size(self) -> int:
         """
@@ -85,6 +155,12 @@ class HashMap:
         """
         return self._capacity
 
+    def get_tombstones(self) -> int:
+        """
+        Return number of tombstones in the current table
+        """
+        return self._tombstones
+
     # ------------------------------------------------------------------ #
 
     def put(self, key: str, value: object) -> None:
@@ -96,45 +172,377 @@ class HashMap:
         :param key:     key to be inserted or updated.
         :param value:   value to be associated with the key.
         '''
-        # Resizes the hash map if the table load is 0.5 or higher.
-        if self.table_load() >= 0.5: 
-            new_capacity = self._next_prime(self._capacity * 2)
-            self.resize_table(new_capacity)
-        
-        # Calculates initial index using the hash function.
-        hash = self._hash_function(key)
-        index = hash % self._capacity
+        self._put(key, self._hash_function(key), value)
+
+    def _put(self, key: str, hash: int, value: object) -> None:
+        '''
+        Runs put for a key whose hash is already known. Every public
+        method taking a key has such a twin with a leading underscore,
+        for callers that already hashed the key to route it (like
+        ShardedHashMap).
+        '''
+        data_at_index, inserted = self._slot(key, hash, value)
+        if not inserted:
+            data_at_index.value = value
+
+    def _slot(self, key: str, hash: int, value: object) -> tuple:
+        '''
+        Returns the live hash entry of the key, inserting a new one
+        with the given value if the key is not in the hash map. Checks
+        the table load as put does, and probes for the key only once.
+
+        :param key:     key to look for or insert.
+        :param hash:    hash of the key.
+        :param value:   value of the new entry, if one is inserted.
+
+        :return:    a tuple (hash entry, True if it was inserted).
+        '''
+        data_at_index, index = self._find(key, hash)
+        if data_at_index is not None:
+            return data_at_index, False
+        return self._link(index, key, hash, value), True
+
+    def _find(self, key: str, hash: int) -> tuple:
+        '''
+        Looks for the key the way put does, without inserting it: checks
+        the table load first, then probes for the key.
+
+        :param key:     key to look for.
+        :param hash:    hash of the key.
+
+        :return:    a tuple (live hash entry or None, index of the
+                    bucket a new entry goes in). The index is -1 when
+                    the entry was found in the old table of an
+                    incremental resize.
+        '''
+        # Moves a few entries out of the old table if an incremental
+        # resize is in progress.
+        if self._old_buckets is not None:
+            self._migrate()
+
+        # Resizes the hash map if the table load is the maximum load
+        # or higher.
+        if self.table_load() >= self._max_load:
+            new_capacity = self._grown_capacity(self._capacity)
+            if self._incremental:
+                self._start_migration(new_capacity)
+            else:
+                self.resize_table(new_capacity)
+
+        # Tombstones are not counted by the table load but they still
+        # fill the probe sequences, so they are cleared if live entries
+        # and tombstones together would pass the maximum load.
+        elif self._tombstones and self._size + self._tombstones + 1 > self._max_load * self._capacity:
+            self._clear_tombstones()
+
+        # If the key is still in the old table of an incremental
+        # resize, returns its entry there.
+        if self._old_buckets is not None:
+            index, data_at_index = self._probe(self._old_buckets, self._old_capacity, key, hash)
+            if data_at_index is not None and data_at_index.is_tombstone == False:
+                return data_at_index, -1
+
+        index, data_at_index = self._locate(key, hash)
+        if data_at_index is not None and data_at_index.is_tombstone == False:
+            return data_at_index, index
+        return None, index
+
+    def _clear_tombstones(self) -> None:
+        '''
+        Clears the tombstones of a table whose live entries and
+        tombstones together reached the maximum load. Compacting at
+        the same capacity leaves as much room as there were tombstones,
+        so it is only done when they are at least an eighth of the
+        capacity. Otherwise the live entries alone are close to the
+        maximum load and the table grows, which drops the tombstones
+        too. Either way the next rehash is O(capacity) insertions away.
+        Like compact, it runs to completion.
+        '''
+        if 8 * self._tombstones >= self._capacity:
+            self.compact()
+        else:
+            self.resize_table(self._grown_capacity(self._capacity))
+
+    def _link(self, index: int, key: str, hash: int, value: object) -> HashEntry:
+        '''
+        Adds a new key/value pair at the index returned by _find() for
+        a key that is not in the hash map, and updates the size.
+
+        :return:    the new hash entry.
+        '''
+        data_at_index = self._fill(index, key, hash, value)
+        self._size += 1
+        return data_at_index
+
+    def _probe(self, buckets: DynamicArray, capacity: int, key: str, hash: int) -> tuple:
+        '''
+        Looks for the key in the given table using quadratic probing.
+
+        :param buckets:     table to look in.
+        :param capacity:    capacity of the table.
+        :param key:         key to look for.
+        :param hash:        hash of the key.
+
+        :return:    a tuple (index, entry). If the key is in the table
+                    entry is its hash entry (which may be a tombstone),
+                    otherwise entry is None and index is the first
+                    empty bucket of the probe sequence, or -1 if the
+                    probe sequence has no empty bucket.
+        '''
+        if self._power_of_two:
+            return self._probe_triangular(buckets, capacity, key, hash)
+
+        index = hash % capacity
         new_index = index
         quadratic_factor = 1
 
+        # With a prime capacity the first (capacity + 1) // 2 probes
+        # are distinct, after that the sequence repeats itself.
+        probes = (capacity + 1) // 2
+
+        data_at_index = buckets.get_at_index(index)
+
+        # Iterates through the probe sequence until the key or an
+        # empty bucket is found. Keys are only compared when the
+        # cached hashes match.
+        while data_at_index is not None and (data_at_index.hash != hash or data_at_index.key != key):
+            if quadratic_factor == probes:
+                return -1, None
+            new_index = (index + quadratic_factor**2) % capacity
+            quadratic_factor += 1
+            data_at_index = buckets.get_at_index(new_index)
+
+        return new_index, data_at_index
+
+    def _probe_triangular(self, buckets: DynamicArray, capacity: int, key: str, hash: int) -> tuple:
+        '''
+        Looks for the key in the given power of two table. The step
+        grows by one each probe, so the offsets are the triangular
+        numbers 1, 3, 6, 10... which visit every bucket once.
+
+        :return:    a tuple (index, entry) as returned by _probe.
+        '''
+        mask = capacity - 1
+        index = hash & mask
+        step = 1
+
+        data_at_index = buckets.get_at_index(index)
+
+        while data_at_index is not None and (data_at_index.hash != hash or data_at_index.key != key):
+            if step == capacity:
+                return -1, None
+            index = (index + step) & mask
+            step += 1
+            data_at_index = buckets.get_at_index(index)
+
+        return index, data_at_index
+
+    def _place(self, key: str, hash: int, value: object) -> bool:
+        '''
+        Inserts or updates the key/value pair in the current table
+        without checking the table load or updating the size.
+
+        :param key:     key to be inserted or updated.
+        :param hash:    hash of the key.
+        :param value:   value to be associated with the key.
+
+        :return:    True if a new key/value pair was added
+                    False if an existing one was updated.
+        '''
+        data_at_index, inserted = self._insert(key, hash, value)
+        if not inserted:
+            data_at_index.value = value
+        return inserted
+
+    def _insert(self, key: str, hash: int, value: object) -> tuple:
+        '''
+        Returns the live hash entry of the key in the current table,
+        inserting a new one with the given value if there is none.
+        Does not check the table load or update the size.
+
+        :param key:     key to look for or insert.
+        :param hash:    hash of the key.
+        :param value:   value of the new entry, if one is inserted.
+
+        :return:    a tuple (hash entry, True if it was inserted).
+        '''
+        index, data_at_index = self._locate(key, hash)
+        if data_at_index is not None and data_at_index.is_tombstone == False:
+            return data_at_index, False
+        return self._fill(index, key, hash, value), True
+
+    def _locate(self, key: str, hash: int) -> tuple:
+        '''
+        Probes the current table for the key, growing the table first
+        if its probe sequence has no empty bucket.
+
+        :return:    a tuple (index, entry) as returned by _probe, with
+                    an index that is never -1.
+        '''
+        index, data_at_index = self._probe(self._buckets, self._capacity, key, hash)
+
+        # If the probe sequence is full, grows the table first, more
+        # than once if a small growth factor still leaves it full.
+        while index < 0:
+            self.resize_table(self._grown_capacity(self._capacity))
+            index, data_at_index = self._probe(self._buckets, self._capacity, key, hash)
+
+        return index, data_at_index
+
+    def _fill(self, index: int, key: str, hash: int, value: object) -> HashEntry:
+        '''
+        Puts the key/value pair in the bucket at the given index, which
+        is empty or holds a tombstone of the key. Does not update the
+        size.
+
+        :return:    the live hash entry.
+        '''
         data_at_index = self._buckets.get_at_index(index)
 
-        # Iterates though the buckets in the hash map looking for 
-        # an empty bucket. If initial bucket is not empty, uses 
-        # quadratic probing for finding a new index.
-        while data_at_index is not None:
-            # If key is already in the hash map, updates its value.
-            if data_at_index.key == key and data_at_index.is_tombstone == False:
-                data_at_index.value = value
-                return
-            # If key is in the hash map but it is a tombstone, 
-            # updates value and size and changes the flag to False.
-            elif data_at_index.key == key and data_at_index.is_tombstone == True:
-                data_at_index.value = value
-                data_at_index.is_tombstone = False
-                self._size += 1
-                return
-            # Uses quadratic probing for finding next empty bucket.
-            else:
-                new_index = (index + quadratic_factor**2) % self._capacity
-                quadratic_factor += 1
-                data_at_index = self._buckets.get_at_index(new_index)
+        # If key is not in the table, inserts a new hash entry in
+        # the empty bucket.
+        if data_at_index is None:
+            data_at_index = self._entry_class(key, value, hash)
+            self._buckets.set_at_index(index, data_at_index)
+            self._append_entry(data_at_index)
+            return data_at_index
+
+        # If key is in the table but it is a tombstone, changes the
+        # flag to False.
+        data_at_index.value = value
+        data_at_index.is_tombstone = False
+        self._tombstones -= 1
+        self._append_entry(data_at_index)
+        return data_at_index
+
+    def _move(self, entry: HashEntry) -> None:
+        '''
+        Puts a live entry whose key is not in the current table in the
+        first empty bucket of its probe sequence, keeping the entry
+        object (and its place in the insertion order).
 
-        # Inserts new hash entry in the empty bucket and updates
-        # the hash map size.
-        self._buckets.set_at_index(new_index, HashEntry(key, value))
-        self._size += 1
+        :param entry:   hash entry to move.
+        '''
+        index, _ = self._locate(entry.key, entry.hash)
+        self._buckets.set_at_index(index, entry)
+
+    def _append_entry(self, entry: HashEntry) -> None:
+        '''
+        Adds the entry at the end of the insertion order.
+        '''
+        entry.order = len(self._entries)
+        self._entries.append(entry)
+        self._version += 1
+
+    def _drop_entry(self, entry: HashEntry) -> None:
+        '''
+        Leaves a hole at the position of the removed entry in the
+        insertion order. The holes are dropped once they outnumber the
+        key/value pairs, so iterating stays O(size).
+        '''
+        self._entries[entry.order] = None
+        self._holes += 1
+        self._version += 1
+
+        if self._holes > self._size:
+            self._entries = [entry for entry in self._entries if entry is not None]
+            for order in range(len(self._entries)):
+                self._entries[order].order = order
+            self._holes = 0
+
+    def _lookup(self, key: str, hash: int) -> HashEntry:
+        '''
+        Returns the live hash entry for the key, looking in the old
+        table too while an incremental resize is in progress.
+
+        :param key:     key to look for.
+        :param hash:    hash of the key.
+
+        :return:    the hash entry or None if the key is not found.
+        '''
+        index, data_at_index = self._probe(self._buckets, self._capacity, key, hash)
+        if data_at_index is not None and data_at_index.is_tombstone == False:
+            return data_at_index
+
+        if self._old_buckets is not None:
+            index, data_at_index = self._probe(self._old_buckets, self._old_capacity, key, hash)
+            if data_at_index is not None and data_at_index.is_tombstone == False:
+                return data_at_index
+
+        return None
+
+    def _start_migration(self, new_capacity: int) -> None:
+        '''
+        Starts an incremental resize. The current table becomes the
+        old table and its entries are moved to the new one a few
+        buckets at a time by _migrate().
+
+        :param new_capacity:    capacity of the new table.
+        '''
+        # A resize that is still running is finished first so only
+        # two tables exist at any time. The pace set below makes this
+        # a no-op when the table grows through put.
+        self._finish_migration()
+
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._old_size = self._size
+        self._migrate_index = 0
+
+        # The new table is allocated in one step.
+        self._buckets = self._array_class([None] * new_capacity)
+        self._capacity = new_capacity
+        self._tombstones = 0
 
+        # Visits enough old buckets per operation that the old table
+        # is empty before the new one reaches the maximum load, even
+        # with a small growth factor. Every put migrates once before
+        # checking the table load.
+        headroom = max(math.ceil(self._max_load * new_capacity) - self._size, 1)
+        self._migrate_buckets = max(self.MIGRATE_BUCKETS, math.ceil(self._old_capacity / headroom))
+
+    def _migrate(self, buckets: int = None) -> None:
+        '''
+        Moves the live entries of the next buckets of the old table
+        to the new table. Ends the incremental resize when the old
+        table has been fully visited.
+
+        :param buckets: number of old buckets to visit, defaults to
+                        the pace set by _start_migration().
+        '''
+        if buckets is None:
+            buckets = self._migrate_buckets
+
+        end = min(self._migrate_index + buckets, self._old_capacity)
+
+        for number in range(self._migrate_index, end):
+            data_at_index = self._old_buckets.get_at_index(number)
+            # Moved entries leave a tombstone so the probe sequences
+            # of the old table stay intact.
+            if data_at_index and data_at_index.is_tombstone == False:
+                tombstone = self._entry_class(data_at_index.key, None, data_at_index.hash)
+                tombstone.is_tombstone = True
+                self._old_buckets.set_at_index(number, tombstone)
+                self._old_size -= 1
+                self._move(data_at_index)
+
+                # A full probe sequence may have grown the table, which
+                # finished the migration.
+                if self._old_buckets is None:
+                    return
+
+        self._migrate_index = end
+        if end == self._old_capacity:
+            self._old_buckets = None
+            self._old_capacity = 0
+            self._old_size = 0
+
+    def _finish_migration(self) -> None:
+        '''
+        Moves every remaining entry of the old table to the new one.
+        '''
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
 
     def table_load(self) -> float:
         '''
@@ -151,14 +559,10 @@ class HashMap:
 
         :return:    an integer representing number of empty buckets.
         '''
-        count = 0
-
-        # Looks for buckets that are empty or have a tombstone.
-        for number in range(self._buckets.length()):
-            if self._buckets.get_at_index(number) == None or self._buckets.get_at_index(number).is_tombstone == True:
-                count += 1
-        
-        return count
+        # Buckets that are empty or have a tombstone are the ones
+        # without a live entry. During an incremental resize part of
+        # the entries are still in the old table.
+        return self._capacity - (self._size - self._old_size)
 
     def resize_table(self, new_capacity: int) -> None:
         '''
@@ -170,56 +574,151 @@ class HashMap:
         if new_capacity < self._size:
             return
 
-        if not self._is_prime(new_capacity):
-            new_capacity = self._next_prime(new_capacity)
+        if self._power_of_two or not self._is_prime(new_capacity):
+            new_capacity = self._next_capacity(new_capacity)
 
-        # Initializes a variable to store original buckets, changes
-        # the capacity to the new one and clears the hash map.            
-        temp_buckets = self._buckets
+        # An explicit resize always runs to completion.
+        self._finish_migration()
+
+        # Keeps growing the capacity while the table load would not
+        # stay below the maximum load.
+        while self._size >= self._max_load * new_capacity:
+            new_capacity = self._grown_capacity(new_capacity)
+
+        # Places the live entries in a new table. Above a maximum load
+        # of 0.5 a quadratic probe sequence can be full of entries, the
+        # table is then built again with a larger capacity. The current
+        # table is only replaced once every entry has a bucket.
+        buckets = self._rebuild(new_capacity)
+        while buckets is None:
+            new_capacity = self._grown_capacity(new_capacity)
+            buckets = self._rebuild(new_capacity)
+
+        self._buckets = buckets
         self._capacity = new_capacity
-        self.clear()
+        self._tombstones = 0
+        self._version += 1
+
+    def _rebuild(self, capacity: int) -> DynamicArray:
+        '''
+        Returns a new table with the live entries of the current one,
+        each in the first empty bucket of its probe sequence, using the
+        cached hash (this rehashes all hash table links without calling
+        the hash function).
+
+        :param capacity:    capacity of the new table.
+
+        :return:    the new table, or None if the probe sequence of an
+                    entry has no empty bucket.
+        '''
+        temp_buckets = self._buckets
+        buckets = self._array_class([None] * capacity)
 
-        # Iterates through the buckets in the old hash map and puts
-        # them in the new one (this rehashes all hash table links).
         for number in range(temp_buckets.length()):
-            if temp_buckets.get_at_index(number) and temp_buckets.get_at_index(number).is_tombstone == False:
-                self.put(temp_buckets.get_at_index(number).key, temp_buckets.get_at_index(number).value)
+            data_at_index = temp_buckets.get_at_index(number)
+            if data_at_index and data_at_index.is_tombstone == False:
+                index, _ = self._probe(buckets, capacity, data_at_index.key, data_at_index.hash)
+                if index < 0:
+                    return None
+                buckets.set_at_index(index, data_at_index)
 
-    def get(self, key: str) -> object:
+        return buckets
+
+    def get(self, key: str, default: object = None) -> object:
         '''
         Returns the value associated with the key if it exists
         on the hash map.
 
-        :param key: key for the value we are searching for.
+        :param key:     key for the value we are searching for.
+        :param default: value returned if the key is not found.
         '''
-        # Calculates the initial index for the key we are looking 
-        # for using the hash function.
-        hash = self._hash_function(key)
-        index = hash % self._capacity
-        new_index = index
-        quadratic_factor = 1
+        return self._get(key, self._hash_function(key), default)
 
-        data_at_index = self._buckets.get_at_index(index)
+    def _get(self, key: str, hash: int, default: object = None) -> object:
+        '''
+        Runs get for a key whose hash is already known.
+        '''
+        if self._old_buckets is not None:
+            self._migrate()
 
-        # Looks for the key in the hash map, if found returns the 
-        # value, else None.
-        while data_at_index is not None:
-            # If the key is found and it is not a tombstone, returns
-            # the value.
-            if data_at_index.key == key and data_at_index.is_tombstone == False:
-                return data_at_index.value
-            # If the key is found and it is a tombstone, returns None.
-            elif data_at_index.key == key and data_at_index.is_tombstone == True:
-                return None
-            # If not found, continues looking using the quadratic
-            # probing until it founds an empty bucket.
-            else:
-                new_index = (index + quadratic_factor**2) % self._capacity
-                quadratic_factor += 1
-                data_at_index = self._buckets.get_at_index(new_index)
+        data_at_index = self._lookup(key, hash)
+        if data_at_index is not None:
+            return data_at_index.value
 
-        # If the while loop arrives at an empty bucket, returns None.
-        return None
+        return default
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        '''
+        Returns the value associated with the key, adding the key with
+        the default value first if it is not in the hash map.
+
+        :param key:     key for the value we are searching for.
+        :param default: value of the key if it is added.
+
+        :return:    the value associated with the key.
+        '''
+        return self._setdefault(key, self._hash_function(key), default)
+
+    def _setdefault(self, key: str, hash: int, default: object = None) -> object:
+        '''
+        Runs setdefault for a key whose hash is already known.
+        '''
+        return self._slot(key, hash, default)[0].value
+
+    def update(self, key: str, function: callable, default: object = None) -> object:
+        '''
+        Replaces the value associated with the key by the result of
+        calling the function on it, with a single lookup. A key that is
+        not in the hash map is added with the function called on the
+        default value.
+
+        :param key:         key of the value to update.
+        :param function:    callable taking the current value and
+                            returning the new one.
+        :param default:     current value of a key that is not found.
+
+        :return:    the new value associated with the key.
+        '''
+        return self._update(key, self._hash_function(key), function, default)
+
+    def _update(self, key: str, hash: int, function: callable, default: object = None) -> object:
+        '''
+        Runs update for a key whose hash is already known.
+        '''
+        data_at_index, index = self._find(key, hash)
+        if data_at_index is not None:
+            data_at_index.value = function(data_at_index.value)
+            return data_at_index.value
+
+        # The value of a new key is computed before the key is added,
+        # so a function that raises leaves the hash map unchanged.
+        return self._link(index, key, hash, function(default)).value
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        '''
+        Adds delta to the value associated with the key, with a single
+        lookup. A key that is not in the hash map is added with the
+        value delta.
+
+        :param key:     key of the counter.
+        :param delta:   amount to add.
+
+        :return:    the new value associated with the key.
+        '''
+        return self._increment(key, self._hash_function(key), delta)
+
+    def _increment(self, key: str, hash: int, delta: int = 1) -> int:
+        '''
+        Runs increment for a key whose hash is already known.
+        '''
+        data_at_index, index = self._find(key, hash)
+        if data_at_index is not None:
+            data_at_index.value += delta
+            return data_at_index.value
+
+        # A new counter starts from 0 like the others, so a delta that
+        # cannot be added to it raises before the key is added.
+        return self._link(index, key, hash, 0 + delta).value
 
     def contains_key(self, key: str) -> bool:
         '''
@@ -230,36 +729,20 @@ class HashMap:
         :return:    True if the key is found
                     False otherwise.
         '''
+        return self._contains_key(key, self._hash_function(key))
+
+    def _contains_key(self, key: str, hash: int) -> bool:
+        '''
+        Runs contains_key for a key whose hash is already known.
+        '''
         # Hash map is empty.
         if self._size == 0:
             return False
 
-        # Calculates the initial index for the key we are looking 
-        # for using the hash function.
-        hash = self._hash_function(key)
-        index = hash % self._capacity
-        new_index = index
-        quadratic_factor = 1
-
-        data_at_index = self._buckets.get_at_index(index)
-
-        # Looks for the key in the hash map.
-        while data_at_index is not None:
-            # If the key is found and it is not a tombstone, returns
-            # True.
-            if data_at_index.key == key and data_at_index.is_tombstone == False:
-                return True
-            # If the key is found and it is a tombstone, returns False.
-            elif data_at_index.key == key and data_at_index.is_tombstone == True:
-                return False
-            # If not found, continues looking using the quadratic
-            # probing until it founds an empty bucket.
-            else:
-                new_index = (index + quadratic_factor**2) % self._capacity
-                quadratic_factor += 1
-                data_at_index = self._buckets.get_at_index(new_index)
+        if self._old_buckets is not None:
+            self._migrate()
 
-        return False
+        return self._lookup(key, hash) is not None
 
     def remove(self, key: str) -> None:
         '''
@@ -267,27 +750,66 @@ class HashMap:
 
         :param key: key to remove from the hash map.
         '''
-        # Calculates the initial index for the key we are looking 
-        # for using the hash function.
-        hash = self._hash_function(key)
-        index = hash % self._capacity
-        new_index = index
-        quadratic_factor = 1
+        self._remove(key, self._hash_function(key))
 
-        data_at_index = self._buckets.get_at_index(index)
+    def _remove(self, key: str, hash: int) -> None:
+        '''
+        Runs remove for a key whose hash is already known.
+        '''
+        if self._old_buckets is not None:
+            self._migrate()
 
-        # Looks for the key in the hash map using the quadratic
-        # probing.
-        while data_at_index and data_at_index.key != key:
-            new_index = (index + quadratic_factor**2) % self._capacity
-            quadratic_factor += 1
-            data_at_index = self._buckets.get_at_index(new_index)
+        if self._delete(key, hash):
+            self._shrink()
+            self._compact_tombstones()
 
-        # If the bucket with the key is found, sets the tombstone
-        # value as True and updates size.
-        if data_at_index and data_at_index.is_tombstone == False:
-            data_at_index.is_tombstone = True
-            self._size -= 1
+    def _delete(self, key: str, hash: int) -> bool:
+        '''
+        Turns the entry of the key into a tombstone.
+
+        :param key:     key to remove from the hash map.
+        :param hash:    hash of the key.
+
+        :return:    True if the key was found
+                    False otherwise.
+        '''
+        # Looks in the current table, then in the old table of an
+        # incremental resize. Only tombstones of the current table
+        # are counted, the old table is dropped when it is empty.
+        tables = [(self._buckets, self._capacity, True)]
+        if self._old_buckets is not None:
+            tables.append((self._old_buckets, self._old_capacity, False))
+
+        for buckets, capacity, current in tables:
+            index, data_at_index = self._probe(buckets, capacity, key, hash)
+
+            # If the bucket with the key is found, sets the tombstone
+            # value as True and updates size.
+            if data_at_index is not None and data_at_index.is_tombstone == False:
+                data_at_index.is_tombstone = True
+                self._size -= 1
+                if current:
+                    self._tombstones += 1
+                else:
+                    self._old_size -= 1
+                self._drop_entry(data_at_index)
+                return True
+
+        return False
+
+    def _compact_tombstones(self) -> None:
+        '''
+        Compacts the table if the tombstones reached the threshold.
+        '''
+        if self._tombstones >= self._tombstone_threshold * self._capacity:
+            self.compact()
+
+    def compact(self) -> None:
+        '''
+        Rehashes the live entries at the current capacity, removing
+        every tombstone from the table.
+        '''
+        self.resize_table(self._capacity)
 
     def clear(self) -> None:
         '''
@@ -295,58 +817,226 @@ class HashMap:
         the current capacity.
         '''
         # Creates a new empty array with as many buckets as capacity.
-        self._buckets = DynamicArray()
+        self._buckets = self._array_class()
         for _ in range(self._capacity):
             self._buckets.append(None)
         self._size = 0
+        self._tombstones = 0
+        self._entries = []
+        self._holes = 0
+        self._version += 1
+
+        # Drops the old table of an incremental resize.
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._old_size = 0
 
     def get_keys_and_values(self) -> DynamicArray:
         '''
         Returns an array containing tuples of all key/value pairs
-        stored in the hash map.
+        stored in the hash map, in insertion order.
 
         :return:    a dynamic array with tuples of key/value pairs.
         '''
-        # Initializes the new array and the variable to keep track
-        # of the position in it.
-        array = DynamicArray()
-        array_index = 0
+        # Walks the entries in insertion order, skipping the holes
+        # left by removed entries instead of every bucket of the table.
+        return DynamicArray([(entry.key, entry.value) for entry in self._entries if entry is not None])
 
-        # Iterates through the buckets of the hash map. 
-        for number in range(self._buckets.length()):
-            data_at_index = self._buckets.get_at_index(number)
-            # If there is an entry in the bucket and does not have
-            # a tombstone, adds the key/value pair to our array.      
-            if data_at_index and data_at_index.is_tombstone == False:
-                array.append((data_at_index.key, data_at_index.value))
-                array_index += 1
-        
-        return array
+    @classmethod
+    def from_pairs(cls, pairs, function, **options) -> "HashMap":
+        '''
+        Builds a hash map from key/value pairs in a single pass. The
+        table is sized once from the number of pairs, every key is
+        hashed and then the entries are placed.
+
+        :param pairs:       a dynamic array (or any iterable) with
+                            tuples of key/value pairs.
+        :param function:    hash function of the new hash map.
+        :param options:     other keyword arguments of the constructor.
+
+        :return:    the new hash map.
+        '''
+        if isinstance(pairs, (DynamicArray, CompactDynamicArray)):
+            pairs = [pairs.get_at_index(number) for number in range(pairs.length())]
+        else:
+            pairs = list(pairs)
+
+        hashes = [function(key) for key, value in pairs]
+
+        # The table is allocated once with enough buckets to keep the
+        # load below the maximum load. A map built from pairs can
+        # shrink down to the smallest capacity.
+        map = cls(int(len(pairs) / options.get('max_load', 0.5)) + 1, function, **options)
+        map._min_capacity = map._next_capacity(1)
+        for (key, value), hash in zip(pairs, hashes):
+            if map._place(key, hash, value):
+                map._size += 1
+
+        return map
+
+    def put_many(self, pairs: DynamicArray) -> None:
+        '''
+        Updates the hash map with every key/value pair in the array.
+        The table is resized at most once, to fit every pair, before
+        the pairs are inserted.
+
+        :param pairs:   a dynamic array with tuples of key/value pairs.
+        '''
+        self._finish_migration()
+
+        # Resizes once so the table load stays below the maximum load
+        # even if every key is new.
+        count = self._size + pairs.length()
+        if count >= self._max_load * self._capacity:
+            self.resize_table(self._next_capacity(int(count / self._max_load) + 1))
+
+        hash_function = self._hash_function
+        place = self._place
+
+        for number in range(pairs.length()):
+            key, value = pairs.get_at_index(number)
+            if place(key, hash_function(key), value):
+                self._size += 1
+
+    def merge(self, other: "HashMap", combine: callable = None) -> None:
+        '''
+        Puts every key/value pair of the other hash map in this one.
+        Keys found in both hash maps get combine(value in this map,
+        value in other), or the value in other if combine is None.
+        When both hash maps use the same hash function the hashes
+        stored in other are reused instead of hashing the keys again.
+
+        :param other:   hash map with the key/value pairs to add.
+        :param combine: callable taking two values and returning the
+                        merged one.
+        '''
+        self._finish_migration()
+
+        # Resizes once so the table load stays below the maximum load
+        # even if every key is new. The rebuilt table has no tombstones.
+        count = self._size + other.get_size()
+        if count + self._tombstones >= self._max_load * self._capacity:
+            self.resize_table(max(self._capacity, self._next_capacity(int(count / self._max_load) + 1)))
+
+        hash_function = self._hash_function
+        reuse = other._hash_function is hash_function
+
+        for entry in other._iterate():
+            key = entry.key
+            hash = entry.hash if reuse else hash_function(key)
+            data_at_index, inserted = self._insert(key, hash, entry.value)
+            if inserted:
+                self._size += 1
+            else:
+                data_at_index.value = combine(data_at_index.value, entry.value) if combine else entry.value
+
+    def get_many(self, keys: DynamicArray) -> DynamicArray:
+        '''
+        Returns the values associated with the keys.
+
+        :param keys:    a dynamic array with the keys to look for.
+
+        :return:    a dynamic array with the value of each key (None
+                    for keys not in the hash map), in the same order.
+        '''
+        values = []
+        lookup = self._lookup
+        hash_function = self._hash_function
+
+        for number in range(keys.length()):
+            key = keys.get_at_index(number)
+            data_at_index = lookup(key, hash_function(key))
+            values.append(data_at_index.value if data_at_index is not None else None)
+
+        return DynamicArray(values)
+
+    def remove_many(self, keys: DynamicArray) -> None:
+        '''
+        Removes the given keys and their values from the hash map.
+
+        :param keys:    a dynamic array with the keys to remove.
+        '''
+        delete = self._delete
+        hash_function = self._hash_function
+
+        for number in range(keys.length()):
+            key = keys.get_at_index(number)
+            delete(key, hash_function(key))
+
+        self._shrink()
+        self._compact_tombstones()
+
+    def _iterate(self):
+        '''
+        Yields the live entries in insertion order, skipping the holes
+        left by removed entries.
+
+        :raise RuntimeError:    if a key/value pair was added or
+                                removed, or the table resized, while
+                                iterating.
+        '''
+        version = self._version
+        for entry in self._entries:
+            if entry is not None:
+                yield entry
+                if self._version != version:
+                    raise RuntimeError('HashMap changed during iteration')
+
+    def keys(self):
+        '''
+        Returns a generator of the keys of the hash map, in insertion
+        order. Unlike get_keys_and_values, no array is built.
+        '''
+        for entry in self._iterate():
+            yield entry.key
+
+    def values(self):
+        '''
+        Returns a generator of the values of the hash map, in insertion
+        order.
+        '''
+        for entry in self._iterate():
+            yield entry.value
+
+    def items(self):
+        '''
+        Returns a generator of the key/value pairs of the hash map, as
+        tuples in insertion order.
+        '''
+        for entry in self._iterate():
+            yield entry.key, entry.value
 
     def __iter__(self):
         '''
         Returns the iterator.
         '''
         self._index = 0
+        self._iter_version = self._version
 
         return self
 
     def __next__(self):
         '''
-        Return next hash entry and advances the iterator.
+        Return next hash entry and advances the iterator. Entries are
+        returned in insertion order.
+
+        :raise RuntimeError:    if the hash map changed since __iter__.
         '''
-        try:
-            hash_entry = self._buckets.get_at_index(self._index)
-            while hash_entry is None or hash_entry.is_tombstone == True:
-                self._index += 1
-                hash_entry = self._buckets.get_at_index(self._index)
+        if self._iter_version != self._version:
+            raise RuntimeError('HashMap changed during iteration')
+
+        entries = self._entries
 
+        # Skips the holes left by removed entries.
+        while self._index < len(entries) and entries[self._index] is None:
             self._index += 1
-            return hash_entry
-            
-        except DynamicArrayException:
+
+        if self._index == len(entries):
             raise StopIteration
-        
+
+        self._index += 1
+        return entries[self._index - 1]
+
 
 # ------------------- BASIC TESTING ---------------------------------------- #
 
@@ -556,3 +1246,138 @@ if __name__ == "__main__":
     print(m)
     for item in m:
         print('K:', item.key, 'V:', item.value)
+
+    print("\nincremental resize example 1")
+    print("----------------------------")
+    m = HashMap(53, hash_function_1, incremental=True)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(round(m.table_load(), 2), m.get_size(), m.get_capacity())
+    print(all(m.get('str' + str(i)) == i * 100 for i in range(150)))
+
+    print("\nfrom_pairs example 1")
+    print("--------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    m = HashMap.from_pairs(m.get_keys_and_values(), hash_function_2)
+    print(m.get_size(), m.get_capacity(), m.get('3'))
+
+    print("\ncompact example 1")
+    print("-----------------")
+    m = HashMap(101, hash_function_1)
+    for i in range(40):
+        m.put('key' + str(i), i)
+    for i in range(0, 40, 2):
+        m.remove('key' + str(i))
+    print(m.get_size(), m.get_tombstones(), m.get_capacity())
+    m.compact()
+    print(m.get_size(), m.get_tombstones(), m.get_capacity(), m.get('key1'))
+
+    print("\npower of two example 1")
+    print("----------------------")
+    m = HashMap(50, mixed(hash_function_2), power_of_two=True)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(round(m.table_load(), 2), m.get_size(), m.get_capacity())
+    print(all(m.get('str' + str(i)) == i * 100 for i in range(150)))
+
+    print("\nload settings example 1")
+    print("-----------------------")
+    m = HashMap(11, hash_function_2, max_load=0.4, growth_factor=4, min_load=0.05)
+    for i in range(100):
+        m.put('str' + str(i), i)
+    print(round(m.table_load(), 2), m.get_size(), m.get_capacity())
+    for i in range(90):
+        m.remove('str' + str(i))
+    print(round(m.table_load(), 2), m.get_size(), m.get_capacity(), m.get('str95'))
+
+    print("\nshrink example 1")
+    print("----------------")
+    m = HashMap(53, hash_function_2, min_load=0.1)
+    for i in range(2000):
+        m.put('str' + str(i), i)
+    print(m.get_size(), m.get_capacity())
+    for i in range(2000):
+        m.remove('str' + str(i))
+        if i % 500 == 499:
+            print(m.get_size(), m.get_capacity(), m.empty_buckets())
+
+    print("\ninsertion order example 1")
+    print("-------------------------")
+    m = HashMap(11, hash_function_1)
+    for key in ('delta', 'alpha', 'charlie', 'bravo', 'echo'):
+        m.put(key, key.upper())
+    m.put('alpha', 'A')
+    m.remove('charlie')
+    m.put('charlie', 'C')
+    m.resize_table(53)
+    print(m.get_keys_and_values())
+
+    print("\nkeys(), values(), items() example 1")
+    print("-----------------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(5):
+        m.put('str' + str(i), i * 10)
+    print(list(m.keys()))
+    print(sum(m.values()))
+    for key, value in m.items():
+        print(key, value)
+
+    print("\nchanged during iteration example 1")
+    print("----------------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(5):
+        m.put('str' + str(i), i)
+    try:
+        for key in m.keys():
+            m.put(key + '0', 0)
+    except RuntimeError as error:
+        print(error, m.get_size())
+
+    print("\nget(), setdefault(), update(), increment() example 1")
+    print("----------------------------------------------------")
+    m = HashMap(11, hash_function_1)
+    print(m.get('apple'), m.get('apple', 0))
+    print(m.setdefault('apple', 5), m.setdefault('apple', 9))
+    print(m.update('apple', lambda value: value * 2), m.update('pear', len, 'abc'))
+    for word in ('plum', 'fig', 'plum', 'plum'):
+        m.increment(word)
+    print(m.increment('fig', 10), list(m.items()))
+    try:
+        m.update('kiwi', lambda value: value + 1)
+    except TypeError:
+        print(m.contains_key('kiwi'), m.get_size())
+
+    print("\nmerge example 1")
+    print("---------------")
+    m = HashMap(11, hash_function_1)
+    other = HashMap(11, hash_function_2)
+    for word in ('apple', 'pear', 'plum'):
+        m.put(word, 1)
+    for word in ('pear', 'fig', 'plum', 'plum'):
+        other.increment(word)
+    m.merge(other, lambda value, other_value: value + other_value)
+    print(list(m.items()))
+    m.merge(other)
+    print(list(m.items()))
+
+    print("\nhigh load churn example 1")
+    print("-------------------------")
+    # Above a maximum load of 0.5 quadratic probe sequences can fill
+    # up, resizes then grow the table until every entry fits.
+    m = HashMap(11, hash_function_fnv1a, max_load=0.8)
+    expected = {}
+    x = 181
+    for i in range(400):
+        x = (x * 1103515245 + 12345) % 2 ** 31
+        key = 'k' + str(x % 30)
+        if x >> 16 & 1:
+            m.put(key, i)
+            expected[key] = i
+        else:
+            m.remove(key)
+            expected.pop(key, None)
+    print(m.get_size(), m.get_capacity(), dict(m.items()) == expected)
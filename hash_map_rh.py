@@ -0,0 +1,335 @@
+# Course: CS261 - Data Structures
+# Description: Hash Map using open addressing with Robin Hood linear
+# probing for collision resolution. Entries that are far from their
+# home bucket take the place of entries that are closer to theirs, so
+# probe lengths stay short and even at high loads, misses stop early
+# and removals shift the following entries back instead of leaving
+# tombstones.
+
+from array import array
+
+from a6_include import (DynamicArray, HashEntry,
+                        hash_function_1, hash_function_2)
+from primes import is_prime, next_prime
+
+
+# Probe distance of an empty bucket.
+EMPTY = -1
+
+# Hashes are stored as unsigned 64-bit integers.
+HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, max_load: float = 0.9) -> None:
+        """
+        Initialize new HashMap that uses
+        Robin Hood linear probing for collision resolution
+        The table grows when the table load would pass max_load
+        """
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._max_load = max_load
+        self._size = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            entry = None
+            if self._distances[i] != EMPTY:
+                entry = HashEntry(self._keys[i], self._values[i], self._hashes[i])
+            out += str(i) + ': ' + str(entry) + '\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Find the closest prime number from the given number using
+        the shared prime table
+        """
+        return next_prime(capacity)
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        return is_prime(capacity)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, capacity: int) -> None:
+        '''
+        Creates empty storage arrays with the given number of buckets.
+
+        :param capacity:    number of buckets.
+        '''
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._distances = array('l', [EMPTY]) * capacity
+
+    def _find(self, key: str, hash: int) -> int:
+        '''
+        Looks for the key. The search stops at the first bucket whose
+        entry is closer to its home bucket than the key would be, as
+        Robin Hood insertion would have placed the key before it.
+
+        :param key:     key to look for.
+        :param hash:    hash of the key.
+
+        :return:    the bucket of the key, or -1 if it is not found.
+        '''
+        distances = self._distances
+        hashes = self._hashes
+        keys = self._keys
+        capacity = self._capacity
+
+        index = hash % capacity
+        distance = 0
+
+        while distances[index] >= distance:
+            if hashes[index] == hash and keys[index] == key:
+                return index
+            index += 1
+            if index == capacity:
+                index = 0
+            distance += 1
+
+        return -1
+
+    def put(self, key: str, value: object) -> None:
+        '''
+        Updates the key/value pair in the hash map. If the key is
+        already in the hash map, updates its value. If not, it adds
+        a new key/value pair.
+
+        :param key:     key to be inserted or updated.
+        :param value:   value to be associated with the key.
+        '''
+        hash = self._hash_function(key) & HASH_MASK
+
+        index = self._find(key, hash)
+        if index >= 0:
+            self._values[index] = value
+            return
+
+        # Grows the table if the new pair would pass the maximum load.
+        if self._size + 1 > self._max_load * self._capacity:
+            self.resize_table(self._next_prime(self._capacity * 2))
+
+        self._insert(key, value, hash)
+        self._size += 1
+
+    def _insert(self, key: str, value: object, hash: int) -> None:
+        '''
+        Inserts a key that is not in the hash map. The entry being
+        placed swaps with any entry closer to its home bucket, which
+        then continues down the probe sequence.
+
+        :param key:     key to be inserted.
+        :param value:   value to be associated with the key.
+        :param hash:    hash of the key.
+        '''
+        distances = self._distances
+        keys = self._keys
+        values = self._values
+        hashes = self._hashes
+        capacity = self._capacity
+
+        index = hash % capacity
+        distance = 0
+
+        while distances[index] != EMPTY:
+            if distances[index] < distance:
+                keys[index], key = key, keys[index]
+                values[index], value = value, values[index]
+                hashes[index], hash = hash, hashes[index]
+                distances[index], distance = distance, distances[index]
+            index += 1
+            if index == capacity:
+                index = 0
+            distance += 1
+
+        keys[index] = key
+        values[index] = value
+        hashes[index] = hash
+        distances[index] = distance
+
+    def table_load(self) -> float:
+        '''
+        Returns the load factor of the hash map.
+
+        :return:    a float representing the load factor.
+        '''
+        return float(self._size / self._capacity)
+
+    def empty_buckets(self) -> int:
+        '''
+        Returns the number of empty buckets in the hash table.
+
+        :return:    an integer representing number of empty buckets.
+        '''
+        return self._capacity - self._size
+
+    def resize_table(self, new_capacity: int) -> None:
+        '''
+        Changes the capacity of the internal hash table. Key/value
+        pairs are maintained and placed with their stored hashes.
+
+        :param new_capacity:    new capacity for the hash map.
+        '''
+        if new_capacity < self._size:
+            return
+
+        if not self._is_prime(new_capacity):
+            new_capacity = self._next_prime(new_capacity)
+
+        # Keeps growing the capacity while the table load would pass
+        # the maximum load.
+        while self._size > self._max_load * new_capacity:
+            new_capacity = self._next_prime(new_capacity * 2)
+
+        keys, values, hashes, distances = self._keys, self._values, self._hashes, self._distances
+        self._capacity = new_capacity
+        self._allocate(new_capacity)
+
+        for number in range(len(distances)):
+            if distances[number] != EMPTY:
+                self._insert(keys[number], values[number], hashes[number])
+
+    def get(self, key: str) -> object:
+        '''
+        Returns the value associated with the key if it exists
+        on the hash map.
+
+        :param key: key for the value we are searching for.
+        '''
+        index = self._find(key, self._hash_function(key) & HASH_MASK)
+        if index >= 0:
+            return self._values[index]
+        return None
+
+    def contains_key(self, key: str) -> bool:
+        '''
+        Looks for the presence of the key in the hash map.
+
+        :param key: key to look for in the hash map.
+
+        :return:    True if the key is found
+                    False otherwise.
+        '''
+        if self._size == 0:
+            return False
+        return self._find(key, self._hash_function(key) & HASH_MASK) >= 0
+
+    def remove(self, key: str) -> None:
+        '''
+        Removes the given key and its value from the hash map. The
+        entries that follow it in the probe sequence are shifted one
+        bucket back, so no tombstone is needed.
+
+        :param key: key to remove from the hash map.
+        '''
+        index = self._find(key, self._hash_function(key) & HASH_MASK)
+        if index < 0:
+            return
+
+        distances = self._distances
+        keys = self._keys
+        values = self._values
+        hashes = self._hashes
+        capacity = self._capacity
+
+        # Moves back every following entry that is not in its home
+        # bucket, stopping at an empty bucket or an entry at home.
+        following = index + 1 if index + 1 < capacity else 0
+        while distances[following] > 0:
+            keys[index] = keys[following]
+            values[index] = values[following]
+            hashes[index] = hashes[following]
+            distances[index] = distances[following] - 1
+            index = following
+            following = index + 1 if index + 1 < capacity else 0
+
+        keys[index] = None
+        values[index] = None
+        distances[index] = EMPTY
+        self._size -= 1
+
+    def clear(self) -> None:
+        '''
+        Clears the contents of the hash map while maintaining
+        the current capacity.
+        '''
+        self._allocate(self._capacity)
+        self._size = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        '''
+        Returns an array containing tuples of all key/value pairs
+        stored in the hash map.
+
+        :return:    a dynamic array with tuples of key/value pairs.
+        '''
+        distances = self._distances
+        return DynamicArray([(self._keys[number], self._values[number])
+                             for number in range(self._capacity) if distances[number] != EMPTY])
+
+    def __iter__(self):
+        '''
+        Returns a generator of hash entries built from the arrays.
+        '''
+        distances = self._distances
+        for number in range(len(distances)):
+            if distances[number] != EMPTY:
+                yield HashEntry(self._keys[number], self._values[number], self._hashes[number])
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput example 1")
+    print("-------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nget example 1")
+    print("-------------")
+    m = HashMap(151, hash_function_2)
+    for i in range(200, 300, 7):
+        m.put(str(i), i * 10)
+    print(m.get_size(), m.get_capacity())
+    for i in range(200, 300, 21):
+        print(i, m.get(str(i)), m.get(str(i)) == i * 10)
+        print(i + 1, m.get(str(i + 1)), m.get(str(i + 1)) == (i + 1) * 10)
+
+    print("\nremove example 1")
+    print("----------------")
+    m = HashMap(11, hash_function_1)
+    for i in range(8):
+        m.put('key' + str(i), i)
+    m.remove('key3')
+    print(m)
+    print(m.get_size(), m.get('key3'), m.get('key4'))
@@ -7,30 +7,93 @@
 # and the methods needed to work with it using separate
 # chaining for collision resolution.
 
+import heapq
+import math
+import multiprocessing
+import operator
+import os
 
-from a6_include import (DynamicArray, LinkedList,
-                        hash_function_1, hash_function_2)
+from collections import deque
+from itertools import islice
+
+from a6_include import (CompactDynamicArray, CompactLinkedList, DynamicArray,
+                        LinkedList, SLNode, hash_function_1, hash_function_2)
+from hash_functions import hash_function_builtin, mixed
+from primes import is_prime, next_prime
 
 
 class HashMap:
+    # Number of old buckets visited per operation during an
+    # incremental resize.
+    MIGRATE_BUCKETS = 4
+
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 incremental: bool = False,
+                 compact: bool = False,
+                 power_of_two: bool = False,
+                 max_load: float = 1.0,
+                 growth_factor: float = 2.0,
+                 min_load: float = 0.0) -> None:
         """
         Initialize new HashMap that uses
         separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        If incremental is True, resizes triggered by put move the
+        chains to the new table a few buckets per operation instead
+        of all at once
+        If compact is True, buckets and nodes use the __slots__ based
+        classes to save memory
+        If power_of_two is True, capacities are powers of two and
+        buckets are found by masking the hash instead of a modulo,
+        which needs a hash function that mixes its low bits well
+        The table grows by growth_factor when the table load reaches
+        max_load. When removals bring it below min_load (0 never
+        shrinks) the table shrinks to a load halfway between both,
+        but never below the initial capacity
         """
-        self._buckets = DynamicArray()
+        # Classes used for the bucket array and the chains.
+        self._array_class = CompactDynamicArray if compact else DynamicArray
+        self._list_class = CompactLinkedList if compact else LinkedList
+
+        self._buckets = self._array_class()
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number (or a power of two)
+        self._power_of_two = power_of_two
+        self._set_capacity(self._next_capacity(capacity))
         for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+            self._buckets.append(self._list_class())
 
         self._hash_function = function
         self._size = 0
 
+        # Buckets of the current table with a non-empty chain.
+        self._occupied = 0
+
+        # Nodes in insertion order, with None where a node was removed.
+        self._entries = []
+        self._holes = 0
+
+        # Changes on every insertion, removal or resize, so iterators
+        # can detect that the hash map changed under them.
+        self._version = 0
+
+        # Load thresholds and growth factor of the resizes. Shrinking
+        # stops at the initial capacity.
+        self._max_load = max_load
+        self._growth_factor = growth_factor
+        self._min_load = min_load
+        self._min_capacity = self._capacity
+
+        # Old table and positions of an incremental resize. Buckets
+        # from _fill_index on may still have no linked list.
+        self._incremental = incremental
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+        self._migrate_buckets = self.MIGRATE_BUCKETS
+        self._fill_index = self._capacity
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
@@ -43,36 +106,54 @@ class HashMap:
 
     def _next_prime(self, capacity: int) -> int:
         """
-        Increment from given number and the find the closest prime number
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Find the closest prime number from the given number using
+        the shared prime table
         """
-        if capacity % 2 == 0:
-            capacity += 1
-
-        while not self._is_prime(capacity):
-            capacity += 2
-
-        return capacity
+        return next_prime(capacity)
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
         """
         Determine if given integer is a prime number and return boolean
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
-        if capacity == 2 or capacity == 3:
-            return True
+        return is_prime(capacity)
 
-        if capacity == 1 or capacity % 2 == 0:
-            return False
+    def _next_capacity(self, capacity: int) -> int:
+        '''
+        Returns the closest valid capacity from the given number: a
+        power of two or a prime number, depending on the policy.
+        '''
+        if self._power_of_two:
+            return 1 << max(capacity - 1, 0).bit_length()
+        return self._next_prime(capacity)
 
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
+    def _grown_capacity(self, capacity: int) -> int:
+        '''
+        Returns the capacity after growing the given one by the growth
+        factor (by one bucket at least), following the policy.
+        '''
+        return self._next_capacity(max(int(capacity * self._growth_factor), capacity + 1))
 
-        return True
+    def _shrink(self) -> None:
+        '''
+        Shrinks the table if the table load is below the minimum load.
+        The new load is halfway between the minimum and maximum loads,
+        so the table is not resized again until it changes by a
+        fraction of its size in either direction.
+        '''
+        if self._size < self._min_load * self._capacity and self._capacity > self._min_capacity:
+            target_load = (self._min_load + self._max_load) / 2
+            new_capacity = max(math.ceil(self._size / target_load), self._min_capacity)
+            if new_capacity < self._capacity:
+                self.resize_table(new_capacity)
+
+    def _set_capacity(self, capacity: int) -> None:
+        '''
+        Changes the capacity and the mask used to find buckets with
+        power of two capacities.
+        '''
+        self._capacity = capacity
+        self._mask = capacity - 1
 
     def get_size(self) -> int:
         """
@@ -99,29 +180,246 @@ class HashMap:
         :param key:     key to be inserted or updated.
         :param value:   value to be associated with the key.
         '''
-        # Resizes the hash map if the table load is 1 or higher.
-        if self.table_load() >= 1:
-            new_capacity = self._capacity * 2
-            if self._is_prime(new_capacity):
-                self.resize_table(new_capacity)
+        self._put(key, self._hash_function(key), value)
+
+    def _put(self, key: str, hash: int, value: object) -> None:
+        '''
+        Runs put for a key whose hash is already known. The methods
+        named after a public one with a leading underscore take the
+        hash this way, so a caller that routes keys by their hash (like
+        ShardedHashMap) hashes each key once.
+        '''
+        node, inserted = self._slot(key, hash, value)
+        if not inserted:
+            node.value = value
+
+    def _slot(self, key: str, hash: int, value: object) -> tuple:
+        '''
+        Returns the node of the key, inserting a new one with the given
+        value if the key is not in the hash map. Checks the table load
+        as put does, and walks the chain of the key only once.
+
+        :param key:     key to look for or insert.
+        :param hash:    hash of the key.
+        :param value:   value of the new node, if one is inserted.
+
+        :return:    a tuple (node, True if it was inserted).
+        '''
+        node, sll_at_index = self._find(key, hash)
+        if node:
+            return node, False
+        return self._link(sll_at_index, key, value, hash), True
+
+    def _find(self, key: str, hash: int) -> tuple:
+        '''
+        Looks for the key the way put does, without inserting it: checks
+        the table load first, then walks the chain of the key.
+
+        :param key:     key to look for.
+        :param hash:    hash of the key.
+
+        :return:    a tuple (node or None, chain the key belongs to).
+                    The chain is None when the node was found in the
+                    old table of an incremental resize.
+        '''
+        # Moves a few chains out of the old table if an incremental
+        # resize is in progress.
+        if self._old_buckets is not None:
+            self._migrate()
+
+        # Resizes the hash map if the table load is the maximum load
+        # or higher.
+        if self.table_load() >= self._max_load:
+            new_capacity = self._grown_capacity(self._capacity)
+            if self._incremental:
+                self._start_migration(new_capacity)
             else:
-                new_capacity = self._next_prime(new_capacity)
                 self.resize_table(new_capacity)
-        
-        # Calculates new index using the hash function and capacity
-        # of the hash map.
-        hash = self._hash_function(key)
-        index = hash % self._capacity
 
+        # If the key is still in the old table of an incremental
+        # resize, returns its node there.
+        if self._old_buckets is not None:
+            node = self._old_buckets.get_at_index(hash % self._old_capacity).contains(key, hash)
+            if node:
+                return node, None
+
+        # Calculates new index using the hash and capacity of the
+        # hash map.
+        index = hash & self._mask if self._power_of_two else hash % self._capacity
+        sll_at_index = self._chain(index)
+        return sll_at_index.contains(key, hash), sll_at_index
+
+    def _link(self, sll_at_index: LinkedList, key: str, value: object, hash: int) -> SLNode:
+        '''
+        Inserts a new key/value pair in the chain returned by _find()
+        for a key that is not in the hash map.
+
+        :return:    the new node.
+        '''
+        if sll_at_index.length() == 0:
+            self._occupied += 1
+        node = sll_at_index.insert(key, value, hash)
+        self._append_entry(node)
+        self._size += 1
+        return node
+
+    def _append_entry(self, node: SLNode) -> None:
+        '''
+        Adds the node at the end of the insertion order.
+        '''
+        node.order = len(self._entries)
+        self._entries.append(node)
+        self._version += 1
+
+    def _drop_entry(self, node: SLNode) -> None:
+        '''
+        Leaves a hole at the position of the removed node in the
+        insertion order. The holes are dropped once they outnumber the
+        key/value pairs, so iterating stays O(size).
+        '''
+        self._entries[node.order] = None
+        self._holes += 1
+        self._version += 1
+
+        if self._holes > self._size:
+            self._entries = [node for node in self._entries if node is not None]
+            for order in range(len(self._entries)):
+                self._entries[order].order = order
+            self._holes = 0
+
+    def _chain(self, index: int) -> LinkedList:
+        '''
+        Returns the linked list at the given index of the current
+        table. Buckets of a table created by an incremental resize
+        start as None and get their linked list on first use.
+
+        :param index:   index of the bucket.
+
+        :return:    the linked list of the bucket.
+        '''
         sll_at_index = self._buckets.get_at_index(index)
+        if sll_at_index is None:
+            sll_at_index = self._list_class()
+            self._buckets.set_at_index(index, sll_at_index)
+        return sll_at_index
 
-        # If the key is in the hash map, updates the value, 
-        # otherwise inserts the new key/value pair.
-        if sll_at_index and sll_at_index.contains(key):
-            sll_at_index.contains(key).value = value
-        else:
-            sll_at_index.insert(key, value)
-            self._size += 1
+    def _lookup(self, key: str, hash: int) -> SLNode:
+        '''
+        Returns the node for the key, looking in the old table too
+        while an incremental resize is in progress.
+
+        :param key:     key to look for.
+        :param hash:    hash of the key.
+
+        :return:    the node or None if the key is not found.
+        '''
+        index = hash & self._mask if self._power_of_two else hash % self._capacity
+        sll_at_index = self._buckets.get_at_index(index)
+        node = sll_at_index.contains(key, hash) if sll_at_index else None
+
+        if node is None and self._old_buckets is not None:
+            node = self._old_buckets.get_at_index(hash % self._old_capacity).contains(key, hash)
+
+        return node
+
+    def _start_migration(self, new_capacity: int) -> None:
+        '''
+        Starts an incremental resize. The current table becomes the
+        old table and its chains are moved to the new one a few
+        buckets at a time by _migrate().
+
+        :param new_capacity:    capacity of the new table.
+        '''
+        # A resize that is still running is finished first so only
+        # two tables exist at any time. The pace set below makes this
+        # a no-op when the table grows through put.
+        self._finish_migration()
+
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._migrate_index = 0
+
+        # The new table is allocated in one step, its linked lists
+        # are created by _migrate() and _chain() as they are needed.
+        self._buckets = self._array_class([None] * new_capacity)
+        self._set_capacity(new_capacity)
+        self._fill_index = 0
+        self._occupied = 0
+
+        # Visits enough old buckets per operation that the old table
+        # is empty before the new one reaches the maximum load, even
+        # with a small growth factor. Every put migrates once before
+        # checking the table load.
+        headroom = max(math.ceil(self._max_load * new_capacity) - self._size, 1)
+        self._migrate_buckets = max(self.MIGRATE_BUCKETS, math.ceil(self._old_capacity / headroom))
+
+    def _migrate(self, buckets: int = None) -> None:
+        '''
+        Moves the chains of the next buckets of the old table to the
+        new table. Ends the incremental resize when the old table has
+        been fully visited.
+
+        :param buckets: number of old buckets to visit, defaults to
+                        the pace set by _start_migration().
+        '''
+        if buckets is None:
+            buckets = self._migrate_buckets
+
+        end = min(self._migrate_index + buckets, self._old_capacity)
+
+        # Keys live in only one of the tables, so nodes can be moved
+        # to the new chains without looking for duplicates.
+        for number in range(self._migrate_index, end):
+            sll_at_index = self._old_buckets.get_at_index(number)
+            node = sll_at_index.pop_node()
+            while node:
+                index = node.hash & self._mask if self._power_of_two else node.hash % self._capacity
+                chain = self._chain(index)
+                if chain.length() == 0:
+                    self._occupied += 1
+                chain.insert_node(node)
+                node = sll_at_index.pop_node()
+
+        self._migrate_index = end
+
+        # Creates the empty linked lists of the new table at the same
+        # pace, so the table is complete when the migration ends.
+        fill_end = self._capacity
+        if end < self._old_capacity:
+            fill_end = min(self._capacity, -(-end * self._capacity // self._old_capacity))
+        for number in range(self._fill_index, fill_end):
+            self._chain(number)
+        self._fill_index = fill_end
+
+        if end == self._old_capacity:
+            self._old_buckets = None
+            self._old_capacity = 0
+
+    def _finish_migration(self) -> None:
+        '''
+        Moves every remaining chain of the old table to the new one,
+        and creates the linked lists the table is still missing.
+        '''
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+        for number in range(self._fill_index, self._capacity):
+            self._chain(number)
+        self._fill_index = self._capacity
+
+    def _reserve(self, capacity: int) -> None:
+        '''
+        Grows a new, empty hash map to the given capacity in one step.
+        Its buckets get their linked list on first use, so the table
+        costs one reference per bucket until keys are added.
+
+        :param capacity:    capacity for the hash map.
+        '''
+        capacity = self._next_capacity(capacity)
+        if self._size == 0 and capacity > self._capacity:
+            self._buckets = self._array_class([None] * capacity)
+            self._set_capacity(capacity)
+            self._fill_index = 0
 
     def empty_buckets(self) -> int:
         '''
@@ -129,14 +427,9 @@ class HashMap:
 
         :return:    an integer representing number of empty buckets.
         '''
-        count = 0
-
-        # Looks for buckets that have an empty linked list.
-        for number in range(self._buckets.length()):
-            if self._buckets.get_at_index(number) and self._buckets.get_at_index(number).length() == 0:
-                count += 1
-        
-        return count
+        # Buckets with an empty linked list (or no linked list yet
+        # during an incremental resize) are the ones not occupied.
+        return self._capacity - self._occupied
 
     def table_load(self) -> float:
         '''
@@ -154,10 +447,19 @@ class HashMap:
         '''
         # Creates a new empty array and populates it with empty
         # linked lists.
-        self._buckets = DynamicArray()
+        self._buckets = self._array_class()
         for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+            self._buckets.append(self._list_class())
         self._size = 0
+        self._occupied = 0
+        self._fill_index = self._capacity
+        self._entries = []
+        self._holes = 0
+        self._version += 1
+
+        # Drops the old table of an incremental resize.
+        self._old_buckets = None
+        self._old_capacity = 0
 
     def resize_table(self, new_capacity: int) -> None:
         '''
@@ -169,41 +471,139 @@ class HashMap:
         if new_capacity < 1:
             return
         
-        if not self._is_prime(new_capacity):
-            new_capacity = self._next_prime(new_capacity)
+        if self._power_of_two or not self._is_prime(new_capacity):
+            new_capacity = self._next_capacity(new_capacity)
+
+        # An explicit resize always runs to completion.
+        self._finish_migration()
 
-        # Initializes a variable to store original buckets, changes
-        # the capacity to the new one and clears the hash map.            
+        # Keeps growing the capacity while the table load would be
+        # above the maximum load, as put would do.
+        while self._size > self._max_load * new_capacity:
+            new_capacity = self._grown_capacity(new_capacity)
+
+        # Initializes a variable to store original buckets and size,
+        # changes the capacity to the new one and clears the hash map.            
         temp_buckets = self._buckets
-        self._capacity = new_capacity
+        size = self._size
+        entries, holes = self._entries, self._holes
+        self._set_capacity(new_capacity)
         self.clear()
 
-        # Iterates through the buckets in the old hash map and puts
-        # them back (this rehashes all hash table links with the new
-        # capacity).
+        # Iterates through the buckets in the old hash map and moves
+        # their nodes to the bucket given by the cached hash. Keys are
+        # unique, so no key comparisons or new nodes are needed.
         for number in range(temp_buckets.length()):
-            if temp_buckets.get_at_index(number) and temp_buckets.get_at_index(number).length() > 0:
-                for node in temp_buckets.get_at_index(number):
-                    self.put(node.key, node.value)
-        
-
-    def get(self, key: str):
+            sll_at_index = temp_buckets.get_at_index(number)
+            node = sll_at_index.pop_node()
+            while node:
+                index = node.hash & self._mask if self._power_of_two else node.hash % self._capacity
+                chain = self._buckets.get_at_index(index)
+                if chain.length() == 0:
+                    self._occupied += 1
+                chain.insert_node(node)
+                node = sll_at_index.pop_node()
+
+        self._size = size
+        self._entries, self._holes = entries, holes
+
+    def get(self, key: str, default: object = None):
         '''
         Returns the value associated with the key if it exists
         on the hash map.
 
-        :param key: key for the value we are searching for.
+        :param key:     key for the value we are searching for.
+        :param default: value returned if the key is not found.
         '''
-        # Calculates the index for the key we are looking for.
-        hash = self._hash_function(key)
-        index = hash % self._capacity
+        return self._get(key, self._hash_function(key), default)
 
-        # Looks for the key in the linked list at our index, if
-        # found returns the value, else None.
-        if self._buckets.get_at_index(index) and self._buckets.get_at_index(index).contains(key):
-            return self._buckets.get_at_index(index).contains(key).value
+    def _get(self, key: str, hash: int, default: object = None) -> object:
+        '''
+        Runs get for a key whose hash is already known.
+        '''
+        if self._old_buckets is not None:
+            self._migrate()
+
+        # Looks for the key in the linked list at its index, if
+        # found returns the value, else the default.
+        node = self._lookup(key, hash)
+        if node:
+            return node.value
         else:
-            return None
+            return default
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        '''
+        Returns the value associated with the key, adding the key with
+        the default value first if it is not in the hash map.
+
+        :param key:     key for the value we are searching for.
+        :param default: value of the key if it is added.
+
+        :return:    the value associated with the key.
+        '''
+        return self._setdefault(key, self._hash_function(key), default)
+
+    def _setdefault(self, key: str, hash: int, default: object = None) -> object:
+        '''
+        Runs setdefault for a key whose hash is already known.
+        '''
+        return self._slot(key, hash, default)[0].value
+
+    def update(self, key: str, function: callable, default: object = None) -> object:
+        '''
+        Replaces the value associated with the key by the result of
+        calling the function on it, with a single lookup. A key that is
+        not in the hash map is added with the function called on the
+        default value.
+
+        :param key:         key of the value to update.
+        :param function:    callable taking the current value and
+                            returning the new one.
+        :param default:     current value of a key that is not found.
+
+        :return:    the new value associated with the key.
+        '''
+        return self._update(key, self._hash_function(key), function, default)
+
+    def _update(self, key: str, hash: int, function: callable, default: object = None) -> object:
+        '''
+        Runs update for a key whose hash is already known.
+        '''
+        node, sll_at_index = self._find(key, hash)
+        if node:
+            node.value = function(node.value)
+            return node.value
+
+        # The value of a new key is computed before the key is added,
+        # so a function that raises leaves the hash map unchanged.
+        return self._link(sll_at_index, key, function(default), hash).value
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        '''
+        Adds delta to the value associated with the key, with a single
+        lookup. A key that is not in the hash map is added with the
+        value delta.
+
+        :param key:     key of the counter.
+        :param delta:   amount to add.
+
+        :return:    the new value associated with the key.
+        '''
+        return self._increment(key, self._hash_function(key), delta)
+
+    def _increment(self, key: str, hash: int, delta: int = 1) -> int:
+        '''
+        Runs increment for a key whose hash is already known.
+        '''
+        node, sll_at_index = self._find(key, hash)
+        if node:
+            node.value += delta
+            return node.value
+
+        # A new counter starts from 0 like the others, so a delta that
+        # cannot be added to it raises before the key is added.
+        return self._link(sll_at_index, key, 0 + delta, hash).value
 
     def contains_key(self, key: str) -> bool:
         '''
@@ -214,17 +614,22 @@ class HashMap:
         :return:    True if the key is found
                     False otherwise.
         '''
+        return self._contains_key(key, self._hash_function(key))
+
+    def _contains_key(self, key: str, hash: int) -> bool:
+        '''
+        Runs contains_key for a key whose hash is already known.
+        '''
         # Hash map is empty.
         if self._size == 0:
             return False
-        
-        # Calculates the index for the key we are looking for.
-        hash = self._hash_function(key)
-        index = hash % self._capacity
 
-        # Looks for the key at the index, if found returns True
+        if self._old_buckets is not None:
+            self._migrate()
+
+        # Looks for the key at its index, if found returns True
         # else, False.
-        if self._buckets.get_at_index(index) and self._buckets.get_at_index(index).contains(key):
+        if self._lookup(key, hash):
             return True
         else:
             return False
@@ -235,86 +640,538 @@ class HashMap:
 
         :param key: key to remove from the hash map.
         '''
+        self._remove(key, self._hash_function(key))
+
+    def _remove(self, key: str, hash: int) -> None:
+        '''
+        Runs remove for a key whose hash is already known.
+        '''
+        if self._old_buckets is not None:
+            self._migrate()
+
         # Calculates the index for the key we want to delete.
-        hash = self._hash_function(key)
-        index = hash % self._capacity
+        index = hash & self._mask if self._power_of_two else hash % self._capacity
 
         # Removes the node from the linked list and updates the size.
-        if self._buckets.get_at_index(index) and self._buckets.get_at_index(index).contains(key):
-            self._buckets.get_at_index(index).remove(key)
-            self._size -= 1
+        sll_at_index = self._buckets.get_at_index(index)
+        node = sll_at_index.remove_node(key, hash) if sll_at_index else None
+        if node:
+            if sll_at_index.length() == 0:
+                self._occupied -= 1
+        elif self._old_buckets is not None:
+            node = self._old_buckets.get_at_index(hash % self._old_capacity).remove_node(key, hash)
+
+        if node is None:
+            return
+
+        self._size -= 1
+        self._drop_entry(node)
+        self._shrink()
 
     def get_keys_and_values(self) -> DynamicArray:
         '''
         Returns an array containing tuples of all key/value pairs
-        stored in the hash map.
+        stored in the hash map, in insertion order.
 
         :return:    a dynamic array with tuples of key/value pairs.
         '''
-        # Initializes the new array and the variable to keep track
-        # of the position in it.
-        array = DynamicArray()
-        array_index = 0
-
-        # Iterates through the buckets of the hash map, if the
-        # linked list in the bucket contains key/value pairs, 
-        # adds them to our array.
-        for number in range(self._buckets.length()):
-            sll_at_index = self._buckets.get_at_index(number)
-            if sll_at_index and sll_at_index.length() > 0:
-                for node in sll_at_index:
-                    array.append((node.key, node.value))
-                    array_index += 1
-        
-        return array
+        # Walks the nodes in insertion order, skipping the holes left
+        # by removed nodes instead of every bucket of the table.
+        return DynamicArray([(node.key, node.value) for node in self._entries if node is not None])
+
+    def __reduce__(self) -> tuple:
+        '''
+        Pickles the hash map as its constructor options and key/value
+        pairs, much smaller than its buckets and nodes. The hash map is
+        rebuilt with from_pairs, so the process that unpickles it
+        hashes the keys again (the built-in hash of a string differs
+        between processes). The hash function must be picklable.
+        '''
+        options = {
+            'incremental': self._incremental,
+            'compact': self._list_class is CompactLinkedList,
+            'power_of_two': self._power_of_two,
+            'max_load': self._max_load,
+            'growth_factor': self._growth_factor,
+            'min_load': self._min_load,
+        }
+        return _unpickle, (type(self), list(self.items()), self._hash_function, options)
+
+    @classmethod
+    def from_pairs(cls, pairs, function: callable = hash_function_1, **options) -> "HashMap":
+        '''
+        Builds a hash map from key/value pairs in a single pass. The
+        table is sized once from the number of pairs, every key is
+        hashed and then the nodes are placed.
+
+        :param pairs:       a dynamic array (or any iterable) with
+                            tuples of key/value pairs.
+        :param function:    hash function of the new hash map.
+        :param options:     other keyword arguments of the constructor.
+
+        :return:    the new hash map.
+        '''
+        if isinstance(pairs, (DynamicArray, CompactDynamicArray)):
+            pairs = [pairs.get_at_index(number) for number in range(pairs.length())]
+        else:
+            pairs = list(pairs)
+
+        hashes = [function(key) for key, value in pairs]
+
+        # The table is allocated once with enough buckets to keep the
+        # load at most the maximum load. A map built from pairs can
+        # shrink down to the smallest capacity.
+        map = cls(math.ceil(len(pairs) / options.get('max_load', 1.0)), function, **options)
+        map._min_capacity = map._next_capacity(1)
+        buckets = map._buckets
+        capacity = map._capacity
+        mask = map._mask if map._power_of_two else None
+        for (key, value), hash in zip(pairs, hashes):
+            sll_at_index = buckets.get_at_index(hash & mask if mask is not None else hash % capacity)
+            node = sll_at_index.contains(key, hash)
+            if node:
+                node.value = value
+            else:
+                if sll_at_index.length() == 0:
+                    map._occupied += 1
+                map._append_entry(sll_at_index.insert(key, value, hash))
+                map._size += 1
+
+        return map
+
+    def put_many(self, pairs: DynamicArray) -> None:
+        '''
+        Updates the hash map with every key/value pair in the array.
+        The table is resized at most once, to fit every pair, before
+        the pairs are inserted.
+
+        :param pairs:   a dynamic array with tuples of key/value pairs.
+        '''
+        self._finish_migration()
+
+        # Resizes once so the table load stays at most the maximum
+        # load even if every key is new.
+        count = self._size + pairs.length()
+        if count > self._max_load * self._capacity:
+            self.resize_table(self._next_capacity(math.ceil(count / self._max_load)))
+
+        buckets = self._buckets
+        capacity = self._capacity
+        mask = self._mask if self._power_of_two else None
+        hash_function = self._hash_function
+
+        for number in range(pairs.length()):
+            key, value = pairs.get_at_index(number)
+            hash = hash_function(key)
+            sll_at_index = buckets.get_at_index(hash & mask if mask is not None else hash % capacity)
+            node = sll_at_index.contains(key, hash)
+            if node:
+                node.value = value
+            else:
+                if sll_at_index.length() == 0:
+                    self._occupied += 1
+                self._append_entry(sll_at_index.insert(key, value, hash))
+                self._size += 1
+
+    def merge(self, other: "HashMap", combine: callable = None) -> None:
+        '''
+        Puts every key/value pair of the other hash map in this one.
+        Keys found in both hash maps get combine(value in this map,
+        value in other), or the value in other if combine is None.
+        When both hash maps use the same hash function the hashes
+        stored in other are reused instead of hashing the keys again.
+
+        :param other:   hash map with the key/value pairs to add.
+        :param combine: callable taking two values and returning the
+                        merged one.
+        '''
+        self._finish_migration()
+
+        # Resizes once so the table load stays at most the maximum
+        # load even if every key is new.
+        count = self._size + other.get_size()
+        if count > self._max_load * self._capacity:
+            self.resize_table(self._next_capacity(math.ceil(count / self._max_load)))
+
+        hash_function = self._hash_function
+        reuse = other._hash_function is hash_function
+
+        buckets = self._buckets
+        capacity = self._capacity
+        mask = self._mask if self._power_of_two else None
+
+        for node in other._iterate():
+            key = node.key
+            hash = node.hash if reuse else hash_function(key)
+            sll_at_index = buckets.get_at_index(hash & mask if mask is not None else hash % capacity)
+            found = sll_at_index.contains(key, hash)
+            if found:
+                found.value = combine(found.value, node.value) if combine else node.value
+            else:
+                if sll_at_index.length() == 0:
+                    self._occupied += 1
+                self._append_entry(sll_at_index.insert(key, node.value, hash))
+                self._size += 1
+
+    def get_many(self, keys: DynamicArray) -> DynamicArray:
+        '''
+        Returns the values associated with the keys.
+
+        :param keys:    a dynamic array with the keys to look for.
+
+        :return:    a dynamic array with the value of each key (None
+                    for keys not in the hash map), in the same order.
+        '''
+        values = []
+        lookup = self._lookup
+        hash_function = self._hash_function
+
+        for number in range(keys.length()):
+            key = keys.get_at_index(number)
+            node = lookup(key, hash_function(key))
+            values.append(node.value if node else None)
+
+        return DynamicArray(values)
+
+    def remove_many(self, keys: DynamicArray) -> None:
+        '''
+        Removes the given keys and their values from the hash map.
+
+        :param keys:    a dynamic array with the keys to remove.
+        '''
+        self._finish_migration()
+
+        buckets = self._buckets
+        capacity = self._capacity
+        mask = self._mask if self._power_of_two else None
+        hash_function = self._hash_function
+
+        for number in range(keys.length()):
+            key = keys.get_at_index(number)
+            hash = hash_function(key)
+            sll_at_index = buckets.get_at_index(hash & mask if mask is not None else hash % capacity)
+            node = sll_at_index.remove_node(key, hash)
+            if node:
+                self._size -= 1
+                if sll_at_index.length() == 0:
+                    self._occupied -= 1
+                self._drop_entry(node)
+
+        self._shrink()
+
+    def _iterate(self):
+        '''
+        Yields the nodes in insertion order, skipping the holes left by
+        removed nodes.
+
+        :raise RuntimeError:    if a key/value pair was added or
+                                removed, or the table resized, while
+                                iterating.
+        '''
+        version = self._version
+        for node in self._entries:
+            if node is not None:
+                yield node
+                if self._version != version:
+                    raise RuntimeError('HashMap changed during iteration')
+
+    def __iter__(self):
+        '''
+        Returns a generator of the nodes of the hash map, in insertion
+        order.
+        '''
+        return self._iterate()
+
+    def keys(self):
+        '''
+        Returns a generator of the keys of the hash map, in insertion
+        order. Unlike get_keys_and_values, no array is built.
+        '''
+        for node in self._iterate():
+            yield node.key
+
+    def values(self):
+        '''
+        Returns a generator of the values of the hash map, in insertion
+        order.
+        '''
+        for node in self._iterate():
+            yield node.value
+
+    def items(self):
+        '''
+        Returns a generator of the key/value pairs of the hash map, as
+        tuples in insertion order.
+        '''
+        for node in self._iterate():
+            yield node.key, node.value
+
+
+def _unpickle(cls, pairs: list, function: callable, options: dict) -> HashMap:
+    '''
+    Rebuilds a pickled hash map from its key/value pairs.
+    '''
+    return cls.from_pairs(pairs, function, **options)
+
 
-def find_mode(da: DynamicArray) -> (DynamicArray, int):
+def _elements(values) -> iter:
+    '''
+    Returns an iterator over a dynamic array or any other iterable.
+    '''
+    if isinstance(values, (DynamicArray, CompactDynamicArray)):
+        return (values.get_at_index(number) for number in range(values.length()))
+    return iter(values)
+
+
+def _counter(values, function: callable) -> HashMap:
+    '''
+    Returns an empty hash map to count the given values. Inputs with a
+    length get a capacity that fits one key per value, so the table
+    never resizes while counting, with buckets that only get a linked
+    list when a key lands in them. Streams start at the default
+    capacity.
+    '''
+    counts = HashMap(11, function)
+    if isinstance(values, (DynamicArray, CompactDynamicArray)):
+        counts._reserve(values.length())
+    elif hasattr(values, '__len__'):
+        counts._reserve(len(values))
+    return counts
+
+
+def count_values(values, function: callable = hash_function_builtin) -> HashMap:
+    '''
+    Counts how many times each value appears.
+
+    :param values:      a dynamic array or any iterable, including
+                        generators, with the values to count.
+    :param function:    hash function of the hash map.
+
+    :return:    a hash map from each value to its count, with the
+                values in order of first appearance.
+    '''
+    counts = _counter(values, function)
+    increment = counts.increment
+    for value in _elements(values):
+        increment(value)
+    return counts
+
+
+def find_mode(da: DynamicArray, function: callable = hash_function_builtin) -> (DynamicArray, int):
     '''
     Finds the mode of a dynamic array using a hash map.
 
-    :param da:  dynamic array we want to find the mode of.
+    :param da:          dynamic array (or any iterable) we want to
+                        find the mode of.
+    :param function:    hash function of the hash map counting the
+                        values.
 
     :return:    a tuple containing (a dynamic array that stores 
+    all the mode values, an integer showing the frequency). The modes
+    are in order of first appearance.
+    '''
+    # Initializes a new hash map sized for the input.
+    map = _counter(da, function)
+    slot = map._slot
+
+    frequency = 0
+    mode_nodes = []
+
+    # Counts every value and keeps the highest frequency and the
+    # nodes of the values that reached it while counting, so the
+    # counts are never read again.
+    for key in _elements(da):
+        node = slot(key, function(key), 0)[0]
+        node.value += 1
+        count = node.value
+        # If the frequency is higher than the previous highest, the
+        # key is the only mode so far.
+        if count > frequency:
+            frequency = count
+            mode_nodes = [node]
+        # If the frequency is the same as the previous highest, adds
+        # the key to the modes.
+        elif count == frequency:
+            mode_nodes.append(node)
+
+    # The modes were found in the order they reached the frequency,
+    # the insertion order of their nodes is their first appearance.
+    mode_nodes.sort(key=operator.attrgetter('order'))
+
+    return (DynamicArray([node.key for node in mode_nodes]), frequency)
+
+
+def top_k(values, k: int, function: callable = hash_function_builtin) -> DynamicArray:
+    '''
+    Finds the k most frequent values. The counts are walked with a
+    heap of k pairs, without building an array of every count.
+
+    :param values:      a dynamic array or any iterable with the values
+                        to count.
+    :param k:           number of values to return.
+    :param function:    hash function of the hash map counting the
+                        values.
+
+    :return:    a dynamic array with up to k tuples (value, count),
+                from the most frequent. Ties keep the order of first
+                appearance.
+    '''
+    counts = count_values(values, function)
+    return DynamicArray(heapq.nlargest(k, counts.items(), key=lambda pair: pair[1]))
+
+
+# Values counted by the worker processes of find_mode_parallel when
+# the input is a dynamic array, set once per worker.
+_shared_values = None
+
+
+def _share(values: DynamicArray) -> None:
+    '''
+    Initializes a worker process with the dynamic array to count. With
+    the fork start method the array is inherited, not copied.
+    '''
+    global _shared_values
+    _shared_values = values
+
+
+def _count_range(task: tuple) -> list:
+    '''
+    Counts the shared values from index start to end in a worker
+    process.
+
+    :param task:    a tuple (start, end, hash function).
+
+    :return:    a list of (value, count) tuples in order of first
+                appearance, which pickles much faster than a hash map.
+    '''
+    start, end, function = task
+    da = _shared_values
+    counts = HashMap(11, function)
+    counts._reserve(end - start)
+    increment = counts.increment
+    for number in range(start, end):
+        increment(da.get_at_index(number))
+    return list(counts.items())
+
+
+def _count_chunk(task: tuple) -> list:
+    '''
+    Counts a list of values in a worker process.
+
+    :param task:    a tuple (values, hash function).
+
+    :return:    a list of (value, count) tuples in order of first
+                appearance.
+    '''
+    chunk, function = task
+    return list(count_values(chunk, function).items())
+
+
+def _add_counts(counts: HashMap, partial: list) -> None:
+    '''
+    Adds the partial counts of a worker to the counts so far, with a
+    single insert per value. The table grows at most once per partial,
+    to fit every value of it, before the counts are added.
+    '''
+    needed = counts.get_size() + len(partial)
+    if needed > counts._max_load * counts.get_capacity():
+        counts.resize_table(max(math.ceil(needed / counts._max_load),
+                                counts._grown_capacity(counts.get_capacity())))
+
+    function = counts._hash_function
+    buckets = counts._buckets
+    capacity = counts.get_capacity()
+    mask = counts._mask if counts._power_of_two else None
+
+    for key, count in partial:
+        hash = function(key)
+        index = hash & mask if mask is not None else hash % capacity
+        sll_at_index = buckets.get_at_index(index)
+        if sll_at_index is None:
+            sll_at_index = counts._chain(index)
+        node = sll_at_index.contains(key, hash)
+        if node:
+            node.value += count
+        else:
+            counts._link(sll_at_index, key, count, hash)
+
+
+def find_mode_parallel(da, processes: int = None,
+                       function: callable = hash_function_builtin,
+                       chunk_size: int = 1 << 16) -> (DynamicArray, int):
+    '''
+    Finds the mode like find_mode, with the modes in the same order of
+    first appearance whatever the number of processes, counting the
+    values in a pool of processes. Each worker counts a range of a
+    dynamic array (or a chunk of any other iterable) in its own hash
+    map and sends back a list of (value, count) tuples. The lists are
+    added in input order to a single hash map, sized once for every
+    range of a dynamic array. At most two chunks per process are
+    pending, so a stream is never fully in memory.
+
+    :param da:          dynamic array (or any iterable) we want to
+                        find the mode of.
+    :param processes:   number of worker processes, defaults to the
+                        number of CPUs. With 1, runs find_mode.
+    :param function:    hash function of the hash maps counting the
+                        values, must be picklable.
+    :param chunk_size:  values sent to a worker at a time when the
+                        input is not a dynamic array.
+
+    :return:    a tuple containing (a dynamic array that stores
     all the mode values, an integer showing the frequency).
     '''
-    # Initializes a new hash map.
-    map = HashMap()
-
-    # Iterates through values in the array passed as an argument.
-    for number in range(da.length()):
-        key = da.get_at_index(number)
-
-        # Looks for the array values in the hash map. If not found
-        # creates a key/value pair with the value being the 
-        # frequency of the key in the array. If found adds one
-        # to the value to update the frequency.
-        if map.contains_key(key):
-            value = map.get(key)
-            map.put(key, value+1)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        return find_mode(da, function)
+
+    # A dynamic array is split in a few ranges per process so a slow
+    # worker does not hold up the others. Other iterables are read in
+    # chunks.
+    if isinstance(da, (DynamicArray, CompactDynamicArray)):
+        length = da.length()
+        step = max(1, -(-length // (4 * processes)))
+        worker = _count_range
+        tasks = ((start, min(start + step, length), function) for start in range(0, length, step))
+        pool = multiprocessing.Pool(processes, _share, (da,))
+    else:
+        iterator = iter(da)
+        worker = _count_chunk
+        tasks = ((chunk, function) for chunk in iter(lambda: list(islice(iterator, chunk_size)), []))
+        pool = multiprocessing.Pool(processes)
+
+    counts = HashMap(11, function)
+    with pool:
+        # The ranges of a dynamic array all come back, so the counts
+        # are sized once for the values of every range.
+        if worker is _count_range:
+            partials = [result.get() for result in [pool.apply_async(worker, (task,)) for task in tasks]]
+            counts._reserve(sum(len(partial) for partial in partials))
+            for partial in partials:
+                _add_counts(counts, partial)
         else:
-            map.put(key, 1)
-    
-    # Creates an array with all key/value pairs in our hash map.
-    map_array = map.get_keys_and_values()
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.apply_async(worker, (task,)))
+                if len(pending) == 2 * processes:
+                    _add_counts(counts, pending.popleft().get())
+
+            while pending:
+                _add_counts(counts, pending.popleft().get())
 
     frequency = 0
     mode_value = DynamicArray()
-    
-    # Iterates through our map array.
-    for number in range(map_array.length()):
-        # Checks the value for frequency in the tuple, if the
-        # frequency is higher than the previous value it clears the 
-        # mode_value array and updates the frequency and mode_value
-        # array.
-        if map_array.get_at_index(number)[1] > frequency:
-            frequency = map_array.get_at_index(number)[1]
+
+    # Partial counts are merged in input order, so the modes come in
+    # order of first appearance.
+    for key, count in counts.items():
+        if count > frequency:
+            frequency = count
             mode_value = DynamicArray()
-            mode_value.append(map_array.get_at_index(number)[0])
-        # If the frequency is the same as the previous highest, adds
-        # the new key to the mode_value array.
-        elif map_array.get_at_index(number)[1] == frequency:
-            mode_value.append(map_array.get_at_index(number)[0])
-    
+            mode_value.append(key)
+        elif count == frequency:
+            mode_value.append(key)
+
     return (mode_value, frequency)
 
 
@@ -518,3 +1375,130 @@ if __name__ == "__main__":
         da = DynamicArray(case)
         mode, frequency = find_mode(da)
         print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}\n")
+
+    print("\nincremental resize example 1")
+    print("----------------------------")
+    m = HashMap(53, hash_function_1, incremental=True)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(round(m.table_load(), 2), m.get_size(), m.get_capacity())
+    print(all(m.get('str' + str(i)) == i * 100 for i in range(150)))
+
+    print("\nfrom_pairs example 1")
+    print("--------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    m = HashMap.from_pairs(m.get_keys_and_values(), hash_function_2)
+    print(m.get_size(), m.get_capacity(), m.get('3'))
+
+    print("\npower of two example 1")
+    print("----------------------")
+    m = HashMap(50, mixed(hash_function_2), power_of_two=True)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(round(m.table_load(), 2), m.get_size(), m.get_capacity())
+    print(all(m.get('str' + str(i)) == i * 100 for i in range(150)))
+
+    print("\nload settings example 1")
+    print("-----------------------")
+    m = HashMap(11, hash_function_2, max_load=0.75, growth_factor=1.5, min_load=0.2)
+    for i in range(100):
+        m.put('str' + str(i), i)
+    print(round(m.table_load(), 2), m.get_size(), m.get_capacity())
+    for i in range(90):
+        m.remove('str' + str(i))
+    print(round(m.table_load(), 2), m.get_size(), m.get_capacity(), m.get('str95'))
+
+    print("\nshrink example 1")
+    print("----------------")
+    m = HashMap(53, hash_function_2, min_load=0.1)
+    for i in range(2000):
+        m.put('str' + str(i), i)
+    print(m.get_size(), m.get_capacity())
+    for i in range(2000):
+        m.remove('str' + str(i))
+        if i % 500 == 499:
+            print(m.get_size(), m.get_capacity(), m.empty_buckets())
+
+    print("\ninsertion order example 1")
+    print("-------------------------")
+    m = HashMap(11, hash_function_1)
+    for key in ('delta', 'alpha', 'charlie', 'bravo', 'echo'):
+        m.put(key, key.upper())
+    m.put('alpha', 'A')
+    m.remove('charlie')
+    m.put('charlie', 'C')
+    m.resize_table(53)
+    print(m.get_keys_and_values())
+
+    print("\nkeys(), values(), items() example 1")
+    print("-----------------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(5):
+        m.put('str' + str(i), i * 10)
+    print(list(m.keys()))
+    print(sum(m.values()))
+    for key, value in m.items():
+        print(key, value)
+
+    print("\nchanged during iteration example 1")
+    print("----------------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(5):
+        m.put('str' + str(i), i)
+    try:
+        for key in m.keys():
+            m.put(key + '0', 0)
+    except RuntimeError as error:
+        print(error, m.get_size())
+
+    print("\nget(), setdefault(), update(), increment() example 1")
+    print("----------------------------------------------------")
+    m = HashMap(11, hash_function_1)
+    print(m.get('apple'), m.get('apple', 0))
+    print(m.setdefault('apple', 5), m.setdefault('apple', 9))
+    print(m.update('apple', lambda value: value * 2), m.update('pear', len, 'abc'))
+    for word in ('plum', 'fig', 'plum', 'plum'):
+        m.increment(word)
+    print(m.increment('fig', 10), list(m.items()))
+    try:
+        m.update('kiwi', lambda value: value + 1)
+    except TypeError:
+        print(m.contains_key('kiwi'), m.get_size())
+
+    print("\nfind_mode stream example 1")
+    print("--------------------------")
+    words = "the cat and the dog and the bird".split()
+    mode, frequency = find_mode(word for word in words)
+    print(f"Mode : {mode}, Frequency: {frequency}")
+    mode, frequency = find_mode(CompactDynamicArray(words))
+    print(f"Mode : {mode}, Frequency: {frequency}")
+
+    print("\ntop_k example 1")
+    print("---------------")
+    print(top_k(words, 2))
+    print(top_k(iter(words), 10).length(), count_values(words).get('and'))
+
+    print("\nmerge example 1")
+    print("---------------")
+    m = HashMap(11, hash_function_1)
+    other = HashMap(11, hash_function_2)
+    for word in ('apple', 'pear', 'plum'):
+        m.put(word, 1)
+    for word in ('pear', 'fig', 'plum', 'plum'):
+        other.increment(word)
+    m.merge(other, lambda value, other_value: value + other_value)
+    print(list(m.items()))
+    m.merge(other)
+    print(list(m.items()))
+
+    print("\nfind_mode_parallel example 1")
+    print("----------------------------")
+    da = DynamicArray(['str' + str(i % 7) for i in range(1000)])
+    mode, frequency = find_mode_parallel(da, processes=2)
+    print(f"Mode : {mode}, Frequency: {frequency}")
+    mode, frequency = find_mode_parallel(iter(words * 100), processes=2, chunk_size=50)
+    print(f"Mode : {mode}, Frequency: {frequency}")
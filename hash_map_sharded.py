@@ -0,0 +1,428 @@
+# Course: CS261 - Data Structures
+# Description: Hash Map split in shards, each one a separate chaining or
+# open addressing HashMap with its own lock. Keys are routed to a shard
+# by the high bits of their mixed hash, so the shards resize one at a
+# time (a resize moves 1/shards of the key/value pairs) and threads
+# working on different shards do not wait for each other. Each key is
+# hashed once: the hash that routes it is passed on to its shard.
+
+import threading
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+from hash_functions import mix64
+
+
+# Value update() passes for a key that merge() finds in one map only.
+_MISSING = object()
+
+
+class ShardedHashMap:
+    def __init__(self, capacity: int, function, shards: int = 8,
+                 map_class: type = hash_map_sc.HashMap, **options) -> None:
+        """
+        Initialize new ShardedHashMap made of shards hash maps of the
+        given class (hash_map_sc.HashMap or hash_map_oa.HashMap)
+        shards is rounded up to a power of two and the capacity is
+        split evenly between them
+        options are passed to the constructor of every shard
+        """
+        self._shard_bits = max(shards - 1, 0).bit_length()
+        shards = 1 << self._shard_bits
+
+        self._hash_function = function
+        self._shards = [map_class(max(capacity // shards, 1), function, **options)
+                        for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+        # Operations and resizes of each shard.
+        self._operations = [0] * shards
+        self._resizes = [0] * shards
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for number in range(len(self._shards)):
+            out += 'shard ' + str(number) + ':\n' + str(self._shards[number])
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map (all shards)
+        """
+        return sum(shard.get_size() for shard in self._shards)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map (all shards)
+        """
+        return sum(shard.get_capacity() for shard in self._shards)
+
+    # ------------------------------------------------------------------ #
+
+    def _shard(self, hash: int) -> int:
+        '''
+        Returns the shard of a key from its hash: the high bits of the
+        mixed hash. The shards use the low bits (or a modulo) of the
+        same hash for their buckets, which stay independent of the
+        shard.
+        '''
+        return mix64(hash) >> (64 - self._shard_bits)
+
+    def _apply(self, key: str, method: str, *args) -> object:
+        '''
+        Hashes the key and calls the method of its shard with the key
+        and its hash while holding the lock of the shard, then updates
+        the stats of the shard.
+
+        :param key:     key the method is called with.
+        :param method:  name of the hash map method taking the hash of
+                        the key after the key (e.g. '_put').
+        :param args:    other arguments of the method.
+
+        :return:    the result of the method.
+        '''
+        hash = self._hash_function(key)
+        number = self._shard(hash)
+        shard = self._shards[number]
+
+        with self._locks[number]:
+            capacity = shard.get_capacity()
+            result = getattr(shard, method)(key, hash, *args)
+            self._operations[number] += 1
+            if shard.get_capacity() != capacity:
+                self._resizes[number] += 1
+
+        return result
+
+    def _apply_many(self, keys: list, method: str, args: list) -> list:
+        '''
+        Calls the method for every key like _apply, grouping the keys
+        by shard so each lock is taken once.
+
+        :param keys:    list of keys.
+        :param method:  name of the hash map method taking the hash of
+                        the key after the key.
+        :param args:    list with a tuple of other arguments per key.
+
+        :return:    a list with the result of each call, in the order
+                    of the keys.
+        '''
+        hash_function = self._hash_function
+        groups = [[] for _ in range(len(self._shards))]
+        for position in range(len(keys)):
+            hash = hash_function(keys[position])
+            groups[self._shard(hash)].append((position, hash))
+
+        results = [None] * len(keys)
+        for number in range(len(groups)):
+            if not groups[number]:
+                continue
+            shard = self._shards[number]
+            call = getattr(shard, method)
+
+            with self._locks[number]:
+                capacity = shard.get_capacity()
+                for position, hash in groups[number]:
+                    results[position] = call(keys[position], hash, *args[position])
+                self._operations[number] += len(groups[number])
+                if shard.get_capacity() != capacity:
+                    self._resizes[number] += 1
+
+        return results
+
+    def put(self, key: str, value: object) -> None:
+        '''
+        Updates the key/value pair in the hash map. If the key is
+        already in the hash map, updates its value. If not, it adds
+        a new key/value pair.
+
+        :param key:     key to be inserted or updated.
+        :param value:   value to be associated with the key.
+        '''
+        self._apply(key, '_put', value)
+
+    def get(self, key: str, default: object = None) -> object:
+        '''
+        Returns the value associated with the key if it exists
+        on the hash map.
+
+        :param key:     key for the value we are searching for.
+        :param default: value returned if the key is not found.
+        '''
+        return self._apply(key, '_get', default)
+
+    def contains_key(self, key: str) -> bool:
+        '''
+        Looks for the presence of the key in the hash map.
+
+        :param key: key to look for in the hash map.
+
+        :return:    True if the key is found
+                    False otherwise.
+        '''
+        return self._apply(key, '_contains_key')
+
+    def remove(self, key: str) -> None:
+        '''
+        Removes the given key and its value from the hash map.
+
+        :param key: key to remove from the hash map.
+        '''
+        self._apply(key, '_remove')
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        '''
+        Returns the value associated with the key, adding the key with
+        the default value first if it is not in the hash map.
+        '''
+        return self._apply(key, '_setdefault', default)
+
+    def update(self, key: str, function: callable, default: object = None) -> object:
+        '''
+        Replaces the value associated with the key by the result of
+        calling the function on it, as one step under the lock of its
+        shard.
+
+        :return:    the new value associated with the key.
+        '''
+        return self._apply(key, '_update', function, default)
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        '''
+        Adds delta to the value associated with the key, as one step
+        under the lock of its shard.
+
+        :return:    the new value associated with the key.
+        '''
+        return self._apply(key, '_increment', delta)
+
+    def put_many(self, pairs: DynamicArray) -> None:
+        '''
+        Updates the hash map with every key/value pair in the array,
+        taking the lock of each shard once.
+
+        :param pairs:   a dynamic array with tuples of key/value pairs.
+        '''
+        pairs = [pairs.get_at_index(number) for number in range(pairs.length())]
+        self._apply_many([key for key, value in pairs], '_put', [(value,) for key, value in pairs])
+
+    def get_many(self, keys: DynamicArray) -> DynamicArray:
+        '''
+        Returns the values associated with the keys, taking the lock of
+        each shard once.
+
+        :param keys:    a dynamic array with the keys to look for.
+
+        :return:    a dynamic array with the value of each key (None
+                    for keys not in the hash map), in the same order.
+        '''
+        keys = [keys.get_at_index(number) for number in range(keys.length())]
+        return DynamicArray(self._apply_many(keys, '_get', [()] * len(keys)))
+
+    def remove_many(self, keys: DynamicArray) -> None:
+        '''
+        Removes the given keys and their values from the hash map,
+        taking the lock of each shard once.
+
+        :param keys:    a dynamic array with the keys to remove.
+        '''
+        keys = [keys.get_at_index(number) for number in range(keys.length())]
+        self._apply_many(keys, '_remove', [()] * len(keys))
+
+    def merge(self, other, combine: callable = None) -> None:
+        '''
+        Puts every key/value pair of the other hash map in this one.
+        Keys found in both hash maps get combine(value in this map,
+        value in other), or the value in other if combine is None.
+
+        :param other:   hash map (of any class with items()) with the
+                        key/value pairs to add.
+        :param combine: callable taking two values and returning the
+                        merged one.
+        '''
+        pairs = list(other.items())
+        keys = [key for key, value in pairs]
+
+        if combine is None:
+            self._apply_many(keys, '_put', [(value,) for key, value in pairs])
+            return
+
+        # A key only in other gets its value, a key in both the
+        # combined value, in a single update of its shard.
+        def merged(value):
+            return lambda current: value if current is _MISSING else combine(current, value)
+
+        self._apply_many(keys, '_update', [(merged(value), _MISSING) for key, value in pairs])
+
+    def table_load(self) -> float:
+        '''
+        Returns the load factor of the hash map (all shards).
+
+        :return:    a float representing the load factor.
+        '''
+        return float(self.get_size() / self.get_capacity())
+
+    def empty_buckets(self) -> int:
+        '''
+        Returns the number of empty buckets in the hash table (all
+        shards).
+
+        :return:    an integer representing number of empty buckets.
+        '''
+        return sum(shard.empty_buckets() for shard in self._shards)
+
+    def resize_table(self, new_capacity: int) -> None:
+        '''
+        Changes the capacity of every shard to its part of the new
+        capacity, one shard at a time.
+
+        :param new_capacity:    new capacity for the hash map (all
+                                shards).
+        '''
+        capacity = max(new_capacity // len(self._shards), 1)
+        for number in range(len(self._shards)):
+            with self._locks[number]:
+                shard = self._shards[number]
+                old_capacity = shard.get_capacity()
+                shard.resize_table(capacity)
+                if shard.get_capacity() != old_capacity:
+                    self._resizes[number] += 1
+
+    def clear(self) -> None:
+        '''
+        Clears the contents of the hash map while maintaining
+        the current capacity.
+        '''
+        for number in range(len(self._shards)):
+            with self._locks[number]:
+                self._shards[number].clear()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        '''
+        Returns an array containing tuples of all key/value pairs
+        stored in the hash map, shard after shard.
+
+        :return:    a dynamic array with tuples of key/value pairs.
+        '''
+        return DynamicArray(list(self.items()))
+
+    def __iter__(self):
+        '''
+        Returns a generator of the nodes (or hash entries) of the hash
+        map, shard after shard. The nodes of a shard are listed under
+        its lock, so other threads can keep writing while the generator
+        is used.
+        '''
+        for number in range(len(self._shards)):
+            with self._locks[number]:
+                nodes = list(self._shards[number]._iterate())
+            yield from nodes
+
+    def items(self):
+        '''
+        Returns a generator of the key/value pairs of the hash map,
+        shard after shard. The pairs of a shard are copied under its
+        lock, so other threads can keep writing while the generator
+        is used, and each shard is seen at a single point in time.
+        '''
+        for number in range(len(self._shards)):
+            with self._locks[number]:
+                pairs = list(self._shards[number].items())
+            yield from pairs
+
+    def keys(self):
+        '''
+        Returns a generator of the keys of the hash map, shard after
+        shard.
+        '''
+        for key, value in self.items():
+            yield key
+
+    def values(self):
+        '''
+        Returns a generator of the values of the hash map, shard after
+        shard.
+        '''
+        for key, value in self.items():
+            yield value
+
+    def stats(self) -> DynamicArray:
+        '''
+        Returns the stats of every shard.
+
+        :return:    a dynamic array with a dictionary per shard, with
+                    its size, capacity, table load, number of
+                    operations and number of resizes.
+        '''
+        stats = DynamicArray()
+        for number in range(len(self._shards)):
+            with self._locks[number]:
+                shard = self._shards[number]
+                stats.append({
+                    'size': shard.get_size(),
+                    'capacity': shard.get_capacity(),
+                    'table_load': round(shard.table_load(), 2),
+                    'operations': self._operations[number],
+                    'resizes': self._resizes[number],
+                })
+        return stats
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput example 1")
+    print("-------------")
+    m = ShardedHashMap(53, hash_function_2, shards=4)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nget example 1")
+    print("-------------")
+    m = ShardedHashMap(31, hash_function_2, shards=4, map_class=hash_map_oa.HashMap)
+    for i in range(200, 300, 7):
+        m.put(str(i), i * 10)
+    print(m.get_size(), m.get_capacity())
+    for i in range(200, 300, 21):
+        print(i, m.get(str(i)), m.get(str(i)) == i * 10)
+        print(i + 1, m.get(str(i + 1)), m.get(str(i + 1)) == (i + 1) * 10)
+
+    print("\nstats example 1")
+    print("---------------")
+    m = ShardedHashMap(8, hash_function_2, shards=4)
+    for i in range(100):
+        m.increment('str' + str(i % 40))
+    m.remove('str0')
+    print(m.get_size(), m.get('str1'), m.contains_key('str0'))
+    for number in range(m.stats().length()):
+        print(m.stats().get_at_index(number))
+
+    print("\nthreads example 1")
+    print("-----------------")
+    m = ShardedHashMap(11, hash_function_1, shards=4)
+    threads = [threading.Thread(target=lambda: [m.increment('key' + str(i % 50)) for i in range(2000)])
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(m.get_size(), sum(m.values()), m.get('key7'))
+
+    print("\nput_many(), get_many(), remove_many(), merge() example 1")
+    print("-------------------------------------------------------")
+    m = ShardedHashMap(16, hash_function_2, shards=4)
+    m.put_many(DynamicArray([(str(i), i) for i in range(30)]))
+    m.remove_many(DynamicArray(['3', '4', 'x']))
+    other = hash_map_oa.HashMap(11, hash_function_2)
+    for key in ('1', '2', 'new'):
+        other.put(key, 100)
+    m.merge(other, lambda value, other_value: value + other_value)
+    print(m.get_size(), m.get_many(DynamicArray(['1', '3', 'new', 'x'])))
+    print(sorted(node.key for node in m)[:5], sum(m.values()))
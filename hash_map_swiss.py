@@ -0,0 +1,381 @@
+# Course: CS261 - Data Structures
+# Description: Hash Map using open addressing with SwissTable style
+# grouped probing for collision resolution. A control byte per bucket
+# keeps 7 bits of the hash of its key, and the 8 control bytes of a
+# group are compared at once as a 64-bit integer, so keys are only
+# compared for buckets whose control byte matches.
+#
+# It is a separate module, like hash_map_rh, rather than a probing mode
+# of hash_map_oa: buckets are control bytes and flat arrays instead of
+# HashEntry objects, the capacity is a power-of-two number of groups,
+# and a removal can empty a bucket outright, none of which fits the
+# tombstones and incremental resize of hash_map_oa. In CPython the word
+# arithmetic costs about as much as the key comparisons it saves, so
+# gets are a little slower than in hash_map_oa; what the map gains is
+# a 7/8 maximum load, so fewer buckets for the same keys.
+
+import sys
+
+from array import array
+
+from a6_include import (DynamicArray, HashEntry,
+                        hash_function_1, hash_function_2)
+
+
+# Control bytes of buckets without a key. Buckets with a key have
+# the 7 low bits of its hash, so their high bit is never set.
+EMPTY = 0x80
+DELETED = 0xFE
+
+# Buckets per group, the control bytes of a group form a 64-bit word.
+GROUP_WIDTH = 8
+LSBS = 0x0101010101010101
+MSBS = 0x8080808080808080
+
+HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+# Odd 64-bit constant used to spread the hash over every bit.
+MIX_MULTIPLIER = 0x9E3779B97F4A7C15
+
+LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def _mix(hash: int) -> int:
+    '''
+    Returns the hash spread over 64 bits, so the group index (high
+    bits) and the control byte (low 7 bits) are both well distributed
+    even for hash functions returning small integers.
+    '''
+    hash = (hash * MIX_MULTIPLIER) & HASH_MASK
+    return hash ^ (hash >> 32)
+
+
+def _first_byte(mask: int) -> int:
+    '''
+    Returns the position in the group of the lowest byte with its
+    high bit set in the mask.
+    '''
+    position = ((mask & -mask).bit_length() - 1) >> 3
+    return position if LITTLE_ENDIAN else GROUP_WIDTH - 1 - position
+
+
+class HashMap:
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new HashMap that uses
+        SwissTable style grouped probing for collision resolution
+        capacity is rounded up to a power of two number of groups
+        """
+        groups = 1
+        while groups * GROUP_WIDTH < capacity:
+            groups *= 2
+        self._allocate(groups)
+
+        self._hash_function = function
+        self._size = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            entry = None
+            if self._ctrl[i] < EMPTY:
+                entry = HashEntry(self._keys[i], self._values[i], self._hashes[i])
+            elif self._ctrl[i] == DELETED:
+                entry = HashEntry(None, None)
+                entry.is_tombstone = True
+            out += str(i) + ': ' + str(entry) + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, groups: int) -> None:
+        '''
+        Creates empty storage arrays with the given number of groups.
+
+        :param groups:  number of groups, a power of two.
+        '''
+        self._capacity = groups * GROUP_WIDTH
+        self._group_mask = groups - 1
+
+        self._ctrl = bytearray([EMPTY]) * self._capacity
+        self._words = memoryview(self._ctrl).cast('Q')
+        self._keys = [None] * self._capacity
+        self._values = [None] * self._capacity
+        self._hashes = array('Q', bytes(8 * self._capacity))
+
+        # Empty buckets that can still be filled before the table load
+        # (counting deleted buckets) reaches 7/8.
+        self._growth_left = self._capacity * 7 // 8
+        self._deleted = 0
+
+    def _find(self, key: str, hash: int) -> int:
+        '''
+        Looks for the key. Groups are visited in triangular order and
+        the search ends at the first group with an empty bucket.
+
+        :param key:     key to look for.
+        :param hash:    mixed hash of the key.
+
+        :return:    the bucket of the key, or -1 if it is not found.
+        '''
+        words = self._words
+        hashes = self._hashes
+        keys = self._keys
+        group_mask = self._group_mask
+
+        pattern = (hash & 0x7F) * LSBS
+        group = (hash >> 7) & group_mask
+        step = 0
+
+        while True:
+            word = words[group]
+
+            # Bytes equal to the control byte of the key get their high
+            # bit set. A false positive is possible next to a true match,
+            # which the hash comparison discards.
+            x = word ^ pattern
+            match = (x - LSBS) & ~x & MSBS
+            while match:
+                index = group * GROUP_WIDTH + _first_byte(match)
+                if hashes[index] == hash and keys[index] == key:
+                    return index
+                match &= match - 1
+
+            # EMPTY is the only control byte with bit 7 set and bit 1
+            # clear.
+            if word & ~(word << 6) & MSBS:
+                return -1
+
+            step += 1
+            group = (group + step) & group_mask
+
+    def _find_free(self, hash: int) -> int:
+        '''
+        Returns the first empty or deleted bucket of the probe
+        sequence of the hash.
+
+        :param hash:    mixed hash of the key.
+        '''
+        words = self._words
+        group_mask = self._group_mask
+
+        group = (hash >> 7) & group_mask
+        step = 0
+
+        while True:
+            free = words[group] & MSBS
+            if free:
+                return group * GROUP_WIDTH + _first_byte(free)
+            step += 1
+            group = (group + step) & group_mask
+
+    def _set(self, index: int, key: str, value: object, hash: int) -> None:
+        '''
+        Stores the key/value pair in the bucket.
+        '''
+        self._ctrl[index] = hash & 0x7F
+        self._keys[index] = key
+        self._values[index] = value
+        self._hashes[index] = hash
+
+    def put(self, key: str, value: object) -> None:
+        '''
+        Updates the key/value pair in the hash map. If the key is
+        already in the hash map, updates its value. If not, it adds
+        a new key/value pair.
+
+        :param key:     key to be inserted or updated.
+        :param value:   value to be associated with the key.
+        '''
+        hash = _mix(self._hash_function(key))
+
+        index = self._find(key, hash)
+        if index >= 0:
+            self._values[index] = value
+            return
+
+        # Rehashes when no empty bucket can be filled anymore: at the
+        # same capacity if enough buckets are only deleted, otherwise
+        # at twice the capacity.
+        if self._growth_left == 0:
+            if self._size * 16 <= self._capacity * 7:
+                self.resize_table(self._capacity)
+            else:
+                self.resize_table(self._capacity * 2)
+
+        index = self._find_free(hash)
+        if self._ctrl[index] == EMPTY:
+            self._growth_left -= 1
+        else:
+            self._deleted -= 1
+
+        self._set(index, key, value, hash)
+        self._size += 1
+
+    def table_load(self) -> float:
+        '''
+        Returns the load factor of the hash map.
+
+        :return:    a float representing the load factor.
+        '''
+        return float(self._size / self._capacity)
+
+    def empty_buckets(self) -> int:
+        '''
+        Returns the number of empty buckets in the hash table.
+
+        :return:    an integer representing number of empty buckets.
+        '''
+        return self._capacity - self._size
+
+    def resize_table(self, new_capacity: int) -> None:
+        '''
+        Changes the capacity of the internal hash table, rounded up to
+        a power of two number of groups. Key/value pairs are kept and
+        placed with their stored hashes.
+
+        :param new_capacity:    new capacity for the hash map.
+        '''
+        if new_capacity < self._size:
+            return
+
+        # Keeps growing the capacity while the table load would pass
+        # 7/8.
+        groups = 1
+        while groups * GROUP_WIDTH < new_capacity or self._size * 8 > groups * GROUP_WIDTH * 7:
+            groups *= 2
+
+        ctrl, keys, values, hashes = self._ctrl, self._keys, self._values, self._hashes
+        self._words.release()
+        self._allocate(groups)
+
+        for number in range(len(ctrl)):
+            if ctrl[number] < EMPTY:
+                self._set(self._find_free(hashes[number]), keys[number], values[number], hashes[number])
+        self._growth_left -= self._size
+
+    def get(self, key: str) -> object:
+        '''
+        Returns the value associated with the key if it exists
+        on the hash map.
+
+        :param key: key for the value we are searching for.
+        '''
+        index = self._find(key, _mix(self._hash_function(key)))
+        if index >= 0:
+            return self._values[index]
+        return None
+
+    def contains_key(self, key: str) -> bool:
+        '''
+        Looks for the presence of the key in the hash map.
+
+        :param key: key to look for in the hash map.
+
+        :return:    True if the key is found
+                    False otherwise.
+        '''
+        if self._size == 0:
+            return False
+        return self._find(key, _mix(self._hash_function(key))) >= 0
+
+    def remove(self, key: str) -> None:
+        '''
+        Removes the given key and its value from the hash map.
+
+        :param key: key to remove from the hash map.
+        '''
+        index = self._find(key, _mix(self._hash_function(key)))
+        if index < 0:
+            return
+
+        # A group that still has an empty bucket has never been full,
+        # so no probe sequence went past it and the bucket can be
+        # emptied. Otherwise it is marked as deleted.
+        word = self._words[index // GROUP_WIDTH]
+        if word & ~(word << 6) & MSBS:
+            self._ctrl[index] = EMPTY
+            self._growth_left += 1
+        else:
+            self._ctrl[index] = DELETED
+            self._deleted += 1
+
+        self._keys[index] = None
+        self._values[index] = None
+        self._size -= 1
+
+    def clear(self) -> None:
+        '''
+        Clears the contents of the hash map while maintaining
+        the current capacity.
+        '''
+        self._words.release()
+        self._allocate(self._group_mask + 1)
+        self._size = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        '''
+        Returns an array containing tuples of all key/value pairs
+        stored in the hash map.
+
+        :return:    a dynamic array with tuples of key/value pairs.
+        '''
+        ctrl = self._ctrl
+        return DynamicArray([(self._keys[number], self._values[number])
+                             for number in range(self._capacity) if ctrl[number] < EMPTY])
+
+    def __iter__(self):
+        '''
+        Returns a generator of hash entries built from the arrays.
+        '''
+        ctrl = self._ctrl
+        for number in range(len(ctrl)):
+            if ctrl[number] < EMPTY:
+                yield HashEntry(self._keys[number], self._values[number], self._hashes[number])
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput example 1")
+    print("-------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nget example 1")
+    print("-------------")
+    m = HashMap(151, hash_function_2)
+    for i in range(200, 300, 7):
+        m.put(str(i), i * 10)
+    print(m.get_size(), m.get_capacity())
+    for i in range(200, 300, 21):
+        print(i, m.get(str(i)), m.get(str(i)) == i * 10)
+        print(i + 1, m.get(str(i + 1)), m.get(str(i + 1)) == (i + 1) * 10)
+
+    print("\nremove example 1")
+    print("----------------")
+    m = HashMap(8, hash_function_1)
+    for i in range(6):
+        m.put('key' + str(i), i)
+    m.remove('key3')
+    print(m)
+    print(m.get_size(), m.get('key3'), m.get('key4'))
@@ -0,0 +1,128 @@
+# Course: CS261 - Data Structures
+# Description: Prime number helpers shared by the HashMap
+# implementations. Primes below SIEVE_LIMIT come from a table built
+# once with a sieve and are found by binary search. Larger numbers are
+# tested with Miller-Rabin, and the primes found for them are kept in
+# a ladder, so a table that keeps doubling its capacity past the sieve
+# finds each prime once.
+
+from bisect import bisect_left
+
+
+# Primes below this limit are kept in a sorted table.
+SIEVE_LIMIT = 1 << 20
+
+# Witnesses that make Miller-Rabin exact below 3.3 * 10 ** 24.
+WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def _sieve(limit: int) -> list:
+    '''
+    Returns the primes below limit, using the sieve of Eratosthenes.
+    '''
+    sieve = bytearray([1]) * limit
+    sieve[0:2] = b'\x00\x00'
+    for number in range(2, int(limit ** 0.5) + 1):
+        if sieve[number]:
+            sieve[number * number::number] = bytes(len(range(number * number, limit, number)))
+    return [number for number in range(limit) if sieve[number]]
+
+
+PRIMES = _sieve(SIEVE_LIMIT)
+
+# Closest prime of each number past the sieve that was looked up,
+# mostly doubled capacities.
+_LADDER = {}
+
+
+def _miller_rabin(number: int) -> bool:
+    '''
+    Returns True if the odd number, larger than every witness, passes
+    the Miller-Rabin test for all of WITNESSES.
+    '''
+    exponent = number - 1
+    shifts = 0
+    while exponent % 2 == 0:
+        exponent //= 2
+        shifts += 1
+
+    for witness in WITNESSES:
+        x = pow(witness, exponent, number)
+        if x == 1 or x == number - 1:
+            continue
+        for _ in range(shifts - 1):
+            x = x * x % number
+            if x == number - 1:
+                break
+        else:
+            return False
+
+    return True
+
+
+def is_prime(number: int) -> bool:
+    '''
+    Determines if the given integer is a prime number.
+
+    :param number:  integer to test.
+
+    :return:    True if number is prime
+                False otherwise.
+    '''
+    if number < SIEVE_LIMIT:
+        index = bisect_left(PRIMES, number)
+        return index < len(PRIMES) and PRIMES[index] == number
+
+    if number % 2 == 0:
+        return False
+
+    # Trial division by the first primes discards most composites
+    # before the modular exponentiations.
+    for factor in PRIMES[1:100]:
+        if number % factor == 0:
+            return False
+
+    return _miller_rabin(number)
+
+
+def next_prime(number: int) -> int:
+    '''
+    Returns the closest odd prime number from the given number, the
+    same result as incrementing it to an odd number and then by 2
+    until it is prime.
+
+    :param number:  number to start from.
+
+    :return:    the smallest odd prime greater than or equal to number.
+    '''
+    if number < PRIMES[-1]:
+        return PRIMES[bisect_left(PRIMES, max(number, 3))]
+
+    if number in _LADDER:
+        return _LADDER[number]
+
+    candidate = number + 1 if number % 2 == 0 else number
+    while not is_prime(candidate):
+        candidate += 2
+
+    _LADDER[number] = candidate
+    return candidate
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nnext_prime example 1")
+    print("--------------------")
+    print([next_prime(number) for number in (0, 1, 2, 3, 4, 11, 22, 53, 106)])
+
+    print("\nladder example 1")
+    print("----------------")
+    capacity = 11
+    for _ in range(8):
+        capacity = next_prime(capacity * 2)
+    print(capacity)
+    for _ in range(20):
+        capacity = next_prime(capacity * 2)
+    print(capacity, is_prime(capacity), is_prime(capacity + 2))